@@ -0,0 +1,129 @@
+"""Cost of the feed's page count as the post table grows: count(*) vs the counter row vs a TTL-cached count.
+
+Adds ``--sizes`` benchmark posts on top of whatever the table already holds,
+timing every strategy at each step; results are keyed by the total row count::
+
+    python -m benchmarks.counts --sizes 1000 10000 100000 1000000 --output counts.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, func, insert, select, text
+
+from src.auth.models import User
+from src.cache import TTLCache
+from src.database import async_session_maker, engine
+from src.posts.counters import POSTS, FEED, increment, post_count
+from src.posts.models import Post
+
+HEAD = "bench-count"
+CHUNK = 5000
+
+
+async def reset(session) -> None:
+    deleted = (await session.execute(delete(Post).where(Post.head.like(f"{HEAD} %")))).rowcount
+    await session.execute(delete(User).where(User.email == f"{HEAD}@example.com"))
+    await session.execute(increment({POSTS: -deleted, FEED: 1}))
+    await session.commit()
+
+
+async def grow(session, user_id, start: int, stop: int) -> None:
+    if engine.dialect.name == "postgresql":
+        await session.execute(text(f"""
+            INSERT INTO post (head, description, user_id, created_at, edit_at, like_count)
+            SELECT '{HEAD} ' || i, 'benchmark post', :user_id, now(), now(), 0 FROM generate_series(:start, :stop - 1) AS i
+        """), {"user_id": user_id, "start": start, "stop": stop})
+    else:
+        for offset in range(start, stop, CHUNK):
+            await session.execute(insert(Post), [
+                {"head": f"{HEAD} {i}", "description": "benchmark post", "user_id": user_id}
+                for i in range(offset, min(offset + CHUNK, stop))
+            ])
+
+    await session.execute(increment({POSTS: stop - start, FEED: 1}))
+    await session.commit()
+
+    if engine.dialect.name == "postgresql":
+        await session.execute(text("ANALYZE post"))
+
+
+async def timed(call, calls: int) -> dict:
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - start)
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "mean_us": round(statistics.fmean(latencies) * 1e6, 1),
+        "p50_us": round(cuts[49] * 1e6, 1),
+        "p99_us": round(cuts[98] * 1e6, 1),
+    }
+
+
+async def measure(session, calls: int, ttl: float) -> dict:
+    cache = TTLCache(maxsize=1, ttl=ttl)
+
+    async def count_all():
+        return await session.scalar(select(func.count()).select_from(Post))
+
+    async def cached():
+        value = cache.get(POSTS)
+        if value is None:
+            value = await count_all()
+            cache.set(POSTS, value)
+        return value
+
+    async def counter():
+        return await post_count(session)
+
+    return {
+        "count(*)": await timed(count_all, calls),
+        "counter": await timed(counter, calls),
+        "ttl-cached": await timed(cached, calls),
+    }
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.counts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--calls", type=int, default=200, help="timed calls per strategy and size")
+    parser.add_argument("--ttl", type=float, default=0.05, help="TTL of the cached count, in seconds")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = {}
+    async with async_session_maker() as session:
+        await reset(session)
+        user_id = uuid.uuid4()
+        await session.execute(insert(User).values(
+            id=user_id, email=f"{HEAD}@example.com", username=HEAD, hashed_password="x",
+            is_active=True, is_superuser=False, is_verified=True,
+        ))
+        await session.commit()
+
+        seeded = 0
+        print(f"{'posts':>10}  {'strategy':<12}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}")
+        for size in sorted(args.sizes):
+            await grow(session, user_id, seeded, size)
+            seeded = size
+
+            total = await session.scalar(select(func.count()).select_from(Post))
+            results[total] = await measure(session, args.calls, args.ttl)
+            for name, result in results[total].items():
+                print(f"{total:>10}  {name:<12}{result['mean_us']:>10}{result['p50_us']:>10}{result['p99_us']:>10}")
+
+        await reset(session)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"dialect": engine.dialect.name, "ttl": args.ttl, "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
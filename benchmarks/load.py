@@ -0,0 +1,256 @@
+"""Concurrent load test of the auth and posts endpoints through an in-process ASGI client.
+
+Seeds the configured database, then runs each scenario with ``--concurrency``
+logged-in clients and reports latency percentiles and throughput::
+
+    python -m benchmarks.load --users 50 --posts 5000 --likes 20000 --output bench.json
+    python -m benchmarks.load --no-seed --compare bench.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import subprocess
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+from fastapi_users.password import PasswordHelper
+from sqlalchemy import delete, insert, or_, select
+
+from src.auth.models import User
+from src.database import async_session_maker, engine
+from src.main import app
+from src.posts.commands import reconcile_like_counts
+from src.posts.counters import FEED, POSTS, increment
+from src.posts.models import Like, Post
+from src.ratelimit import like_limit, post_limit
+
+PASSWORD = "bench-password"
+EMAIL = "bench-{}@example.com"
+CHUNK = 1000
+SCENARIOS = ("login", "feed", "addlike", "addpost", "edit-post", "login-storm")
+
+
+async def reset():
+    """Remove every user, post and like created by earlier benchmark runs."""
+    async with async_session_maker() as session:
+        users = select(User.id).where(User.email.like(EMAIL.format("%")))
+        posts = select(Post.id).where(Post.user_id.in_(users))
+        await session.execute(delete(Like).where(or_(Like.user_id.in_(users), Like.post_id.in_(posts))))
+        deleted = (await session.execute(delete(Post).where(Post.user_id.in_(users)))).rowcount
+        await session.execute(delete(User).where(User.email.like(EMAIL.format("%"))))
+        await session.execute(increment({POSTS: -deleted, FEED: 1}))
+        await session.commit()
+
+
+async def seed(users: int, posts: int, likes: int) -> dict:
+    """Create bench users and their posts and likes; returns ``{email: [owned post ids]}``."""
+    tag = uuid.uuid4().hex[:8]
+    hashed_password = PasswordHelper().hash(PASSWORD)
+    accounts = [
+        {"id": uuid.uuid4(), "email": EMAIL.format(f"{tag}-{i}"), "username": f"bench-{tag}-{i}",
+         "hashed_password": hashed_password, "is_active": True, "is_superuser": False, "is_verified": True}
+        for i in range(users)
+    ]
+    owned = {account["email"]: [] for account in accounts}
+
+    async with async_session_maker() as session:
+        await session.execute(insert(User), accounts)
+
+        now = datetime.utcnow()
+        rows = [
+            {"head": f"bench {tag} {i}", "description": f"benchmark post {i} " * 8,
+             "user_id": accounts[i % users]["id"], "created_at": now, "edit_at": now}
+            for i in range(posts)
+        ]
+        post_ids = []
+        for start in range(0, len(rows), CHUNK):
+            post_ids += (await session.scalars(insert(Post).returning(Post.id), rows[start:start+CHUNK])).all()
+        for i, post_id in enumerate(post_ids):
+            owned[accounts[i % users]["email"]].append(post_id)
+
+        pairs = set()
+        likes = min(likes, users * posts)
+        while len(pairs) < likes:
+            pairs.add((random.choice(accounts)["id"], random.choice(post_ids)))
+        pairs = [{"user_id": user_id, "post_id": post_id} for user_id, post_id in pairs]
+        for start in range(0, len(pairs), CHUNK):
+            await session.execute(insert(Like), pairs[start:start+CHUNK])
+
+        await session.execute(increment({POSTS: posts, FEED: 1}))
+        await session.commit()
+        await reconcile_like_counts(session)
+
+    return owned
+
+
+class VirtualUser:
+    def __init__(self, email: str, posts: list[int]):
+        self.email = email
+        self.posts = posts
+        self.sent = 0
+        # the auth cookie is Secure, so it is only sent back over https
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="https://bench")
+
+    async def login(self) -> httpx.Response:
+        return await self.client.post("/auth/jwt/login", data={"username": self.email, "password": PASSWORD})
+
+
+def scenarios(post_ids: list[int]) -> dict:
+    async def feed(vu: VirtualUser):
+        return await vu.client.get(f"/posts/feed-posts/{random.randint(1, 10)}")
+
+    async def addlike(vu: VirtualUser):
+        return await vu.client.get(f"/posts/addlike/{random.choice(post_ids)}")
+
+    async def addpost(vu: VirtualUser):
+        vu.sent += 1
+        head = f"bench {uuid.uuid4().hex[:8]} {vu.sent}"
+        return await vu.client.post("/posts/addpost", data={"head": head, "description": "load test post"})
+
+    async def edit_post(vu: VirtualUser):
+        vu.sent += 1
+        post_id = random.choice(vu.posts)
+        data = {"head": f"bench edited {post_id} {uuid.uuid4().hex[:8]}", "description": f"edit {vu.sent}"}
+        return await vu.client.post(f"/posts/edit-post/{post_id}", data=data)
+
+    return {"login": VirtualUser.login, "feed": feed, "addlike": addlike, "addpost": addpost, "edit-post": edit_post}
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+    }
+
+
+async def run(call, vus: list[VirtualUser], requests: int, background=None, background_vus=()) -> dict:
+    """Issue ``requests`` calls from ``vus``; ``background`` keeps running on ``background_vus`` meanwhile."""
+    latencies = []
+    errors = 0
+    issued = itertools.count()
+    finished = asyncio.Event()
+
+    async def load(vu: VirtualUser):
+        while not finished.is_set():
+            await background(vu)
+
+    async def worker(vu: VirtualUser):
+        nonlocal errors
+        while next(issued) < requests:
+            start = time.perf_counter()
+            response = await call(vu)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    loaders = [asyncio.create_task(load(vu)) for vu in background_vus if background]
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(vu) for vu in vus))
+    elapsed = time.perf_counter() - start
+    finished.set()
+    await asyncio.gather(*loaders)
+
+    return summarize(latencies, errors, elapsed)
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results: dict, baseline: dict = None) -> None:
+    print(f"{'scenario':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, result in results.items():
+        line = (f"{name:<12}{result['rps']:>10}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+                f"{result['p99_ms']:>10}{result['errors']:>8}")
+        previous = baseline and baseline["results"].get(name)
+        if previous and previous["rps"]:
+            line += f"  ({(result['rps'] / previous['rps'] - 1) * 100:+.1f}% req/s vs {baseline['commit']})"
+        print(line)
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--likes", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument(
+        "--scenario", action="append", choices=SCENARIOS, help="run only these scenarios (repeatable), login-storm measures the feed"
+    )
+    parser.add_argument("--no-seed", action="store_true", help="reuse users and posts from the previous run")
+    parser.add_argument("--rate-limit", action="store_true", help="keep the write rate limits enabled")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    if not args.rate_limit:
+        app.dependency_overrides[like_limit] = app.dependency_overrides[post_limit] = lambda: None
+
+    if not args.no_seed:
+        await reset()
+        owned = await seed(args.users, args.posts, args.likes)
+    else:
+        async with async_session_maker() as session:
+            rows = await session.execute(
+                select(User.email, Post.id).join(Post, Post.user_id == User.id)
+                .where(User.email.like(EMAIL.format("%")))
+            )
+            owned = {}
+            for email, post_id in rows:
+                owned.setdefault(email, []).append(post_id)
+        if not owned:
+            parser.error("no benchmark data found, run without --no-seed first")
+
+    accounts = list(owned.items())
+    vus = [VirtualUser(*accounts[i % len(accounts)]) for i in range(args.concurrency)]
+    for vu in vus:
+        if (await vu.login()).status_code >= 400:
+            raise SystemExit(f"login failed for {vu.email}")
+
+    calls = scenarios([post_id for posts in owned.values() for post_id in posts])
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        if name == "login-storm":
+            # feed latency while half of the clients keep logging in
+            results[name] = await run(calls["feed"], vus[::2], args.requests, calls["login"], vus[1::2])
+        else:
+            results[name] = await run(calls[name], vus, args.requests)
+
+    for vu in vus:
+        await vu.client.aclose()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    report(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "commit": commit(),
+                "timestamp": datetime.utcnow().isoformat(),
+                "database": engine.dialect.name,
+                "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+                "results": results,
+            }, file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
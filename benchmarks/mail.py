@@ -0,0 +1,140 @@
+"""Email throughput against a local SMTP server: a connection per message vs the pooled batches vs the mail queue.
+
+Starts an aiosmtpd server on localhost (implicit TLS with a throwaway
+self-signed certificate unless ``--plain``) and points ``src.auth.mail`` at it::
+
+    python -m benchmarks.mail --messages 2000 --output mail.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import socket
+import ssl
+import tempfile
+import time
+
+from aiosmtpd.controller import Controller
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from src.auth import mail
+from src.config import MAIL_BATCH_SIZE, SMTP_POOL_SIZE
+
+
+class CountingHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def tls_context(directory: str) -> ssl.SSLContext:
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+
+    cert_path, key_path = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as file:
+        file.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as file:
+        file.write(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+        ))
+
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def payloads(count: int) -> list:
+    return [{"subject": "benchmark", "to": f"user{i}@example.com", "body": "<p>hello</p>"} for i in range(count)]
+
+
+def per_message(batch: list) -> None:
+    # what every send cost before the pool: connect, handshake and log in for one message
+    for payload in batch:
+        server = mail.smtp_connect()
+        server.send_message(mail.email_message(payload))
+        server.quit()
+
+
+def pooled(batch: list) -> None:
+    pool = mail.SMTPPool()
+    for offset in range(0, len(batch), MAIL_BATCH_SIZE):
+        pool.send_batch(batch[offset:offset + MAIL_BATCH_SIZE])
+    pool.close()
+
+
+async def queued(batch: list) -> None:
+    queue = mail.MailQueue()
+    for payload in batch:
+        queue.put(payload)
+    await queue.stop(timeout=600)
+
+
+async def measure(name: str, call, batch: list, handler: CountingHandler) -> dict:
+    handler.received = 0
+    start = time.perf_counter()
+    if asyncio.iscoroutinefunction(call):
+        await call(batch)
+    else:
+        await asyncio.to_thread(call, batch)
+    elapsed = time.perf_counter() - start
+
+    assert handler.received == len(batch), f"{name}: {handler.received} of {len(batch)} delivered"
+    return {"seconds": round(elapsed, 3), "per_second": round(len(batch) / elapsed, 1)}
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.mail")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--plain", action="store_true", help="plain SMTP instead of implicit TLS")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    handler = CountingHandler()
+    with tempfile.TemporaryDirectory() as directory:
+        context = None if args.plain else tls_context(directory)
+        controller = Controller(handler, hostname="127.0.0.1", port=free_port(), ssl_context=context)
+        controller.start()
+
+    mail.SMTP_HOST, mail.SMTP_PORT, mail.SMTP_SSL, mail.SMTP_USER = "127.0.0.1", controller.port, not args.plain, None
+    batch = payloads(args.messages)
+
+    results = {}
+    try:
+        print(f"{'strategy':<14}{'seconds':>10}{'msgs/s':>10}")
+        for name, call in (("per-message", per_message), ("pooled", pooled), ("queue", queued)):
+            results[name] = await measure(name, call, batch, handler)
+            print(f"{name:<14}{results[name]['seconds']:>10}{results[name]['per_second']:>10}")
+    finally:
+        controller.stop()
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "messages": args.messages, "tls": not args.plain, "batch_size": MAIL_BATCH_SIZE,
+                "pool_size": SMTP_POOL_SIZE, "results": results,
+            }, file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
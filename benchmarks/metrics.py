@@ -0,0 +1,132 @@
+"""Per-request cost of the metrics middleware and the per-statement engine hooks.
+
+Drives small throwaway apps in-process through httpx's ASGI transport, each
+endpoint running ``--queries`` statements on an in-memory SQLite database,
+with and without MetricsMiddleware and with and without instrument_engine::
+
+    python -m benchmarks.metrics --requests 20000 --queries 0 --output metrics.json
+    python -m benchmarks.metrics --requests 20000 --queries 10
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.metrics import MetricsMiddleware, instrument_engine
+
+
+def make_engine(hooks: bool):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    if hooks:
+        instrument_engine(engine)
+    return engine
+
+
+def make_app(middleware: bool, hooks: bool, queries: int) -> FastAPI:
+    engine = make_engine(hooks)
+
+    app = FastAPI()
+    if middleware:
+        app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{id}")
+    async def item(id: int):
+        async with engine.connect() as conn:
+            for _ in range(queries):
+                await conn.execute(text("SELECT 1"))
+        return {"id": id}
+
+    return app
+
+
+async def measure(apps: dict, requests: int, rounds: int) -> dict:
+    """Per-request latencies of every app; the apps take turns in ``rounds`` so drift hits them all alike."""
+    clients = {
+        name: httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        for name, app in apps.items()
+    }
+    latencies = {name: [] for name in apps}
+
+    for client in clients.values():
+        for i in range(100):
+            await client.get(f"/items/{i}")  # warm-up
+
+    for _ in range(rounds):
+        for name, client in clients.items():
+            for i in range(requests // rounds):
+                start = time.perf_counter()
+                await client.get(f"/items/{i}")
+                latencies[name].append(time.perf_counter() - start)
+
+    for client in clients.values():
+        await client.aclose()
+
+    results = {}
+    for name, samples in latencies.items():
+        cuts = statistics.quantiles(samples, n=100, method="inclusive")
+        results[name] = {
+            "mean_us": round(statistics.fmean(samples) * 1e6, 1),
+            "p50_us": round(cuts[49] * 1e6, 1),
+            "p99_us": round(cuts[98] * 1e6, 1),
+        }
+    return results
+
+
+async def per_statement(statements: int, rounds: int) -> dict:
+    """Latency of single statements on one connection, with and without the engine hooks."""
+    engines = {"plain": make_engine(False), "instrumented": make_engine(True)}
+    latencies = {name: [] for name in engines}
+
+    for _ in range(rounds):
+        for name, engine in engines.items():
+            async with engine.connect() as conn:
+                for _ in range(statements // rounds):
+                    start = time.perf_counter()
+                    await conn.execute(text("SELECT 1"))
+                    latencies[name].append(time.perf_counter() - start)
+
+    return {name: round(statistics.median(samples) * 1e6, 1) for name, samples in latencies.items()}
+
+
+VARIANTS = {
+    "bare": (False, False),
+    "middleware": (True, False),
+    "engine hooks": (False, True),
+    "both": (True, True),
+}
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.metrics")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=5, help="statements per request")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    apps = {name: make_app(middleware, hooks, args.queries) for name, (middleware, hooks) in VARIANTS.items()}
+    results = await measure(apps, args.requests, args.rounds)
+
+    print(f"{'variant':<16}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'overhead us':>13}")
+    for name, result in results.items():
+        result["overhead_us"] = round(result["p50_us"] - results["bare"]["p50_us"], 1)
+        print(f"{name:<16}{result['mean_us']:>10}{result['p50_us']:>10}{result['p99_us']:>10}{result['overhead_us']:>13}")
+
+    statements = await per_statement(args.requests * 5, args.rounds)
+    print(f"\nstatement p50: {statements['plain']} us plain, {statements['instrumented']} us instrumented")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "queries": args.queries, "requests": args.requests, "results": results, "statement_p50_us": statements,
+            }, file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
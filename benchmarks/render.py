@@ -0,0 +1,120 @@
+"""Feed page rendering for 10/100/1000 posts: buffered vs streamed, and template loading with and without the bytecode cache.
+
+No database needed, posts are synthetic. ``buffered`` is what TemplateResponse
+does (the whole page before the first byte); ``streamed`` is stream_template's
+chunked ``generate()``, so its first-byte time is the first 8 KB chunk::
+
+    python -m benchmarks.render --sizes 10 100 1000 --output render.json
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import uuid
+from types import SimpleNamespace
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from src.templating import templates, _buffered
+
+TEMPLATES = "src/templates"
+
+
+def feed_context(size: int) -> dict:
+    user_id = str(uuid.uuid4())
+    fragment = templates.get_template("post.html")
+    posts = [
+        SimpleNamespace(id=i, head=f"post {i}", description="lorem ipsum dolor sit amet " * 20, user_id=user_id)
+        for i in range(size)
+    ]
+
+    return {
+        "posts": [{"id": post.id, "user_id": post.user_id, "html": fragment.render(post=post)} for post in posts],
+        "pages": 1,
+        "next_cursor": None,
+        "prev_cursor": None,
+        "page": 1,
+        "user": user_id,
+        "likes": {post.id: {"count": post.id % 7, "liked": post.id % 2 == 0} for post in posts},
+    }
+
+
+def percentiles(samples: list[float]) -> dict:
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50_ms": round(cuts[49] * 1000, 3), "p99_ms": round(cuts[98] * 1000, 3)}
+
+
+def render(size: int, calls: int) -> dict:
+    template = templates.get_template("feed.html")
+    context = feed_context(size)
+
+    buffered = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        template.render(context)
+        buffered.append(time.perf_counter() - start)
+
+    first_byte, streamed = [], []
+    for _ in range(calls):
+        start = time.perf_counter()
+        chunks = _buffered(template.generate(context))
+        next(chunks)
+        first_byte.append(time.perf_counter() - start)
+        for _ in chunks:
+            pass
+        streamed.append(time.perf_counter() - start)
+
+    return {
+        "buffered": percentiles(buffered),
+        "streamed_first_byte": percentiles(first_byte),
+        "streamed_total": percentiles(streamed),
+    }
+
+
+def load(cache_dir, calls: int) -> dict:
+    """Time to load every template in a fresh environment, as a new worker does."""
+    names = Environment(loader=FileSystemLoader(TEMPLATES)).list_templates()
+    samples = []
+    for _ in range(calls):
+        env = Environment(loader=FileSystemLoader(TEMPLATES), auto_reload=False)
+        if cache_dir is not None:
+            env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+        start = time.perf_counter()
+        for name in names:
+            env.get_template(name)
+        samples.append(time.perf_counter() - start)
+
+    return percentiles(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.render")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = {"render": {}}
+    print(f"{'posts':>6}  {'variant':<20}{'p50 ms':>10}{'p99 ms':>10}")
+    for size in args.sizes:
+        results["render"][size] = render(size, args.calls)
+        for name, result in results["render"][size].items():
+            print(f"{size:>6}  {name:<20}{result['p50_ms']:>10}{result['p99_ms']:>10}")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        load(cache_dir, 2)  # fill the cache, as the first worker would
+        results["load"] = {"no cache": load(None, args.calls), "bytecode cache": load(cache_dir, args.calls)}
+
+    print(f"\n{'template load':<28}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, result in results["load"].items():
+        print(f"{name:<28}{result['p50_ms']:>10}{result['p99_ms']:>10}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Search latency over synthetic posts: tsvector + GIN vs an ILIKE scan vs the in-process index.
+
+Seeds ``--posts`` rows (default one million) of Zipf-distributed words into the
+configured database, then times each strategy over the same queries::
+
+    python -m benchmarks.search --posts 1000000 --output search.json
+    python -m benchmarks.search --no-seed --queries 200
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, func, insert, or_, select, text
+
+from src.auth.models import User
+from src.database import async_session_maker, engine
+from src.posts.counters import POSTS, FEED, increment
+from src.posts.models import Post, POST_COLUMNS
+from src.posts.search import InvertedIndex, search_posts
+
+HEAD = "bench-search"
+VOCABULARY = 5000
+WORDS_PER_POST = 20
+CHUNK = 5000
+
+
+def word(rng: random.Random) -> str:
+    # cubing a uniform sample skews towards low ids, giving a few very common words and a long tail
+    return f"w{int(rng.random() ** 3 * VOCABULARY)}"
+
+
+async def reset() -> int:
+    async with async_session_maker() as session:
+        deleted = (await session.execute(delete(Post).where(Post.head.like(f"{HEAD} %")))).rowcount
+        await session.execute(delete(User).where(User.email == f"{HEAD}@example.com"))
+        await session.execute(increment({POSTS: -deleted, FEED: 1}))
+        await session.commit()
+
+    return deleted
+
+
+async def seed(posts: int) -> None:
+    async with async_session_maker() as session:
+        user_id = uuid.uuid4()
+        await session.execute(insert(User).values(
+            id=user_id, email=f"{HEAD}@example.com", username=HEAD, hashed_password="x",
+            is_active=True, is_superuser=False, is_verified=True,
+        ))
+
+        if engine.dialect.name == "postgresql":
+            # generated server-side, shipping a million rows through the driver would dominate the run
+            await session.execute(text(f"""
+                INSERT INTO post (head, description, user_id, created_at, edit_at, like_count)
+                SELECT '{HEAD} ' || i,
+                       (SELECT string_agg('w' || floor(random() ^ 3 * {VOCABULARY})::int, ' ')
+                        FROM generate_series(1, {WORDS_PER_POST}) WHERE i > 0),
+                       :user_id, now(), now(), 0
+                FROM generate_series(1, :posts) AS i
+            """), {"user_id": user_id, "posts": posts})
+        else:
+            rng = random.Random(0)
+            for start in range(0, posts, CHUNK):
+                await session.execute(insert(Post), [
+                    {"head": f"{HEAD} {i}", "description": " ".join(word(rng) for _ in range(WORDS_PER_POST)),
+                     "user_id": user_id}
+                    for i in range(start, min(start + CHUNK, posts))
+                ])
+
+        await session.execute(increment({POSTS: posts, FEED: 1}))
+        await session.commit()
+
+    if engine.dialect.name == "postgresql":
+        async with engine.connect() as conn:
+            await conn.execute(text("ANALYZE post"))
+
+
+def summarize(latencies: list[float]) -> dict:
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "queries": len(latencies),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+    }
+
+
+async def timed(call, queries: list[str]) -> dict:
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        result = call(q)
+        if inspect.isawaitable(result):
+            await result
+        latencies.append(time.perf_counter() - start)
+
+    return summarize(latencies)
+
+
+async def run(queries: list[str], limit: int) -> dict:
+    results = {}
+
+    async with async_session_maker() as session:
+        if engine.dialect.name == "postgresql":
+            async def tsvector(q):
+                await search_posts(session, q, limit)
+
+            results["tsvector"] = await timed(tsvector, queries)
+
+        async def ilike(q):
+            conditions = [or_(Post.head.ilike(f"%{term}%"), Post.description.ilike(f"%{term}%")) for term in q.split()]
+            await session.execute(select(*POST_COLUMNS).where(*conditions).order_by(Post.id.desc()).limit(limit))
+
+        results["ilike"] = await timed(ilike, queries)
+
+        start = time.perf_counter()
+        index = InvertedIndex()
+        result = await session.stream(select(Post.id, Post.head, Post.description).execution_options(yield_per=CHUNK))
+        index.build([row async for row in result], None)
+        build = time.perf_counter() - start
+
+        def in_process(q):
+            return index.search(q)[:limit]
+
+        results["in-process"] = {
+            **await timed(in_process, queries),
+            "build_s": round(build, 2),
+        }
+
+    return results
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.search")
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--no-seed", action="store_true", help="reuse posts from the previous run")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    if not args.no_seed:
+        await reset()
+        start = time.perf_counter()
+        await seed(args.posts)
+        print(f"seeded {args.posts} posts in {time.perf_counter() - start:.1f}s")
+
+    async with async_session_maker() as session:
+        posts = await session.scalar(select(func.count()).select_from(Post).where(Post.head.like(f"{HEAD} %")))
+
+    # one common word, one mid-frequency word, and a two-word query per round
+    rng = random.Random(1)
+    queries = [
+        rng.choice([word(rng), f"w{rng.randrange(VOCABULARY)}", f"{word(rng)} {word(rng)}"])
+        for _ in range(args.queries)
+    ]
+    results = await run(queries, args.limit)
+
+    print(f"{posts} posts, {engine.dialect.name}")
+    print(f"{'strategy':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, result in results.items():
+        extra = f"  (index build {result['build_s']}s)" if "build_s" in result else ""
+        print(f"{name:<12}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}{extra}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"posts": posts, "dialect": engine.dialect.name, "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
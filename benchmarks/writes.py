@@ -0,0 +1,180 @@
+"""Edit and delete throughput: the old select-then-write handlers vs the single conditional statements.
+
+``before`` replays what ``edit_post`` and ``delete_post`` did originally
+(load the post, compare the owner in Python, then write); ``statement`` runs
+just the conditional write; ``handler`` calls the current route handlers,
+which also bump the feed version. Each of
+``--clients`` concurrent sessions edits its own post ``--writes`` times, then
+deletes ``--writes`` of its own posts.
+Postgres only, the handlers use data-modifying CTEs::
+
+    python -m benchmarks.writes --clients 10 --writes 500 --output writes.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import delete, exists, insert, select, text, update
+
+from src.auth.models import User
+from src.database import async_session_maker, engine
+from src.posts import router
+from src.posts.counters import POSTS, FEED, increment
+from src.posts.models import Counter, Like, Post
+
+HEAD = "bench-writes"
+
+
+async def reset() -> None:
+    async with async_session_maker() as session:
+        deleted = (await session.execute(delete(Post).where(Post.head.like(f"{HEAD} %")))).rowcount
+        await session.execute(delete(User).where(User.email.like(f"{HEAD}-%@example.com")))
+        await session.execute(increment({POSTS: -deleted, FEED: 1}))
+        await session.commit()
+
+
+async def seed(clients: int, posts: int) -> list[tuple[User, list[int]]]:
+    """One user per client, each owning ``posts`` posts."""
+    seeded = []
+    async with async_session_maker() as session:
+        for client in range(clients):
+            user = User(
+                id=uuid.uuid4(), email=f"{HEAD}-{client}@example.com", username=f"{HEAD}-{client}",
+                hashed_password="x", is_active=True, is_superuser=False, is_verified=True,
+            )
+            session.add(user)
+            await session.flush()
+            result = await session.execute(insert(Post).returning(Post.id), [
+                {"head": f"{HEAD} {client}-{i}", "description": "benchmark post", "user_id": user.id}
+                for i in range(posts)
+            ])
+            seeded.append((user, list(result.scalars())))
+
+        await session.execute(increment({POSTS: clients * posts, FEED: 1}))
+        await session.commit()
+
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE post"))
+
+    return seeded
+
+
+async def edit_before(session, user, id):
+    result = await session.execute(select(Post).where(Post.id == id))
+    if not (result.scalars().all()[0].user_id == user.id):
+        raise Exception
+
+    data = {"head": f"{HEAD} {user.id}", "description": "edited", "user_id": user.id, "edit_at": datetime.utcnow()}
+    await session.execute(update(Post).values(**data).where(Post.id == id))
+    await session.commit()
+
+
+async def delete_before(session, user, id):
+    result = await session.execute(select(Post).where(Post.id == id))
+    if user.id != result.scalars().all()[0].user_id:
+        raise Exception
+
+    result = await session.execute(delete(Post).where(Post.id == id).returning(Post.id))
+    if result.first() is not None:
+        await session.execute(increment({POSTS: -1}))
+    await session.commit()
+
+
+async def edit_statement(session, user, id):
+    data = {"head": f"{HEAD} {user.id}", "description": "edited", "user_id": user.id, "edit_at": datetime.utcnow()}
+    result = await session.execute(
+        update(Post).values(**data).where(Post.id == id, Post.user_id == user.id).returning(Post.id)
+    )
+    assert result.first() is not None
+    await session.commit()
+
+
+async def delete_statement(session, user, id):
+    deleted = delete(Post).where(Post.id == id, Post.user_id == user.id).returning(Post.id).cte("deleted")
+    likes = delete(Like).where(Like.post_id.in_(select(deleted.c.id))).returning(Like.id).cte("likes")
+    counted = increment({POSTS: -1}).where(exists(select(deleted.c.id))).returning(Counter.value).cte("counted")
+    result = await session.execute(select(deleted.c.id).add_cte(likes, counted))
+    assert result.first() is not None
+    await session.commit()
+
+
+async def edit_handler(session, user, id):
+    response = await router.edit_post(id, head=f"{HEAD} {user.id}", description="edited", session=session, user=user)
+    assert response.status_code == 302
+
+
+async def delete_handler(session, user, id):
+    response = await router.delete_post(id, session=session, user=user)
+    assert response.status_code == 302
+
+
+VARIANTS = {
+    "before": (edit_before, delete_before),
+    "statement": (edit_statement, delete_statement),
+    "handler": (edit_handler, delete_handler),
+}
+
+
+async def client(write, user, ids: list[int], latencies: list[float]) -> None:
+    async with async_session_maker() as session:
+        for id in ids:
+            start = time.perf_counter()
+            await write(session, user, id)
+            latencies.append(time.perf_counter() - start)
+
+
+async def measure(write, targets: list[tuple[User, list[int]]]) -> dict:
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(write, user, ids, latencies) for user, ids in targets))
+    elapsed = time.perf_counter() - start
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "writes": len(latencies),
+        "per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+    }
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.writes")
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--writes", type=int, default=500, help="edits and deletes per client and variant")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    if engine.dialect.name != "postgresql":
+        parser.error("the route handlers need Postgres, point DATABASE_URL at one")
+
+    await reset()
+    # every variant deletes its own slice of posts, the first post of each user is the one edited
+    seeded = await seed(args.clients, 1 + len(VARIANTS) * args.writes)
+
+    results = {}
+    print(f"{'variant':<18}{'writes':>8}{'writes/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for index, (variant, (edit, remove)) in enumerate(VARIANTS.items()):
+        offset = 1 + index * args.writes
+        for operation, write, targets in (
+            ("edit", edit, [(user, ids[:1] * args.writes) for user, ids in seeded]),
+            ("delete", remove, [(user, ids[offset:offset + args.writes]) for user, ids in seeded]),
+        ):
+            name = f"{operation}-{variant}"
+            results[name] = await measure(write, targets)
+            result = results[name]
+            print(f"{name:<18}{result['writes']:>8}{result['per_second']:>10}{result['p50_ms']:>9}{result['p99_ms']:>9}")
+
+    await reset()
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"clients": args.clients, "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,12 +1,51 @@
+import secrets
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException
 from fastapi_users import FastAPIUsers
+import starlette.status as status
 
-from src.auth.base_config import auth_backend
+from src.auth.base_config import auth_backend, cookie_transport, get_jwt_strategy
 from src.auth.manager import get_user_manager
 from src.auth.models import User
+from src.config import JWT_USER_CLAIMS, AUTH_STRATEGY, METRICS_TOKEN
 
 fastapi_users = FastAPIUsers[User, int](
     get_user_manager,
     [auth_backend]
 )
 
-current_active_user = fastapi_users.current_user(active=True)
\ No newline at end of file
+async def current_claims_user(
+        token: Optional[str] = Depends(cookie_transport.scheme), user_manager=Depends(get_user_manager)
+) -> User:
+    user = await get_jwt_strategy().read_claims_user(token, user_manager)
+
+    if user is None or not user.is_active:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    return user
+
+if JWT_USER_CLAIMS and AUTH_STRATEGY == "jwt":
+    current_active_user = current_claims_user
+else:
+    current_active_user = fastapi_users.current_user(active=True)
+
+optional_superuser = fastapi_users.current_user(active=True, superuser=True, optional=True)
+
+async def operator_access(
+        authorization: Optional[str] = Header(None), user: Optional[User] = Depends(optional_superuser)
+) -> None:
+    """Guard for the stats endpoints: a superuser session, or ``Authorization: Bearer <METRICS_TOKEN>`` for scrapers."""
+    if user is not None:
+        return
+
+    if METRICS_TOKEN and authorization is not None and secrets.compare_digest(
+            authorization.encode(), f"Bearer {METRICS_TOKEN}".encode()
+    ):
+        return
+
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail={
+        "status": "not success",
+        "detail": None,
+        "data": None
+    })
@@ -0,0 +1,110 @@
+import logging
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from src.config import QUERY_AUDIT_REPEAT, QUERY_AUDIT_SLOW_MS
+
+logger = logging.getLogger(__name__)
+
+_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\$\d+|%\(\w+\)s|(?<![:\w]):\w+|\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*"), "(...)"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def normalize(statement: str) -> str:
+    """Strip literals, bind markers and expanded IN/VALUES lists so equivalent statements group together."""
+    for pattern, replacement in _PATTERNS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+class QueryAudit:
+    """Statements issued while the audit is active, grouped by normalized SQL.
+
+    Audits nest: a statement recorded by an inner audit is also recorded by the
+    audit that was active when it was created.
+    """
+
+    def __init__(self, parent: Optional["QueryAudit"] = None):
+        self.parent = parent
+        self.statements = {}
+        self.count = 0
+
+    def record(self, statement: str, elapsed: float) -> None:
+        key = normalize(statement)
+        entry = self.statements.setdefault(key, {"count": 0, "total": 0.0, "max": 0.0})
+        entry["count"] += 1
+        entry["total"] += elapsed
+        entry["max"] = max(entry["max"], elapsed)
+        self.count += 1
+        if self.parent is not None:
+            self.parent.record(statement, elapsed)
+
+    def repeated(self, threshold: int = QUERY_AUDIT_REPEAT) -> list:
+        return [(sql, entry) for sql, entry in self.statements.items() if entry["count"] >= threshold]
+
+    def slow(self, threshold_ms: float = QUERY_AUDIT_SLOW_MS) -> list:
+        return [(sql, entry) for sql, entry in self.statements.items() if entry["max"] * 1000 >= threshold_ms]
+
+    def report(self) -> str:
+        lines = [f"{self.count} statements, {len(self.statements)} distinct"]
+        for sql, entry in sorted(self.statements.items(), key=lambda item: -item[1]["count"]):
+            lines.append(f"  {entry['count']}x {entry['total'] * 1000:.1f}ms  {sql}")
+        return "\n".join(lines)
+
+
+_current_audit: ContextVar[Optional[QueryAudit]] = ContextVar("query_audit", default=None)
+
+
+def record(statement: str, elapsed: float) -> None:
+    audit = _current_audit.get()
+    if audit is not None:
+        audit.record(statement, elapsed)
+
+
+@contextmanager
+def audit_queries():
+    audit = QueryAudit(parent=_current_audit.get())
+    token = _current_audit.set(audit)
+    try:
+        yield audit
+    finally:
+        _current_audit.reset(token)
+
+
+def warn(audit: QueryAudit, label: str) -> None:
+    for sql, entry in audit.repeated():
+        logger.warning("%s: possible N+1, %s identical statements: %s", label, entry["count"], sql)
+    for sql, entry in audit.slow():
+        logger.warning("%s: slow statement, %.1fms: %s", label, entry["max"] * 1000, sql)
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: Optional[int] = None):
+    """Fail with AssertionError if the block issues more than ``max_queries`` statements.
+
+    Usable directly in pytest around an in-process request, e.g. with an
+    ``httpx.AsyncClient(transport=ASGITransport(app))``::
+
+        with query_budget(3):
+            await client.get("/posts/api/feed")
+
+    With ``max_repeats`` set, any single normalized statement issued more often
+    than that also fails the block. Only statements on engines passed to
+    ``src.metrics.instrument_engine`` are counted; the app's engines and the
+    test engines in tests/conftest.py are.
+    """
+    with audit_queries() as audit:
+        yield audit
+
+    if audit.count > max_queries:
+        raise AssertionError(f"query budget of {max_queries} exceeded: {audit.report()}")
+    if max_repeats is not None:
+        repeated = audit.repeated(max_repeats + 1)
+        if repeated:
+            raise AssertionError(f"statements repeated more than {max_repeats} times: {audit.report()}")
@@ -1,13 +1,178 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import jwt
+from fastapi import Depends
+from fastapi_users import exceptions
 from fastapi_users.authentication import CookieTransport, JWTStrategy, AuthenticationBackend
-from src.config import SECRET
+from fastapi_users.authentication.strategy.db import DatabaseStrategy
+from fastapi_users.jwt import generate_jwt, decode_jwt
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from src.auth.models import User, get_access_token_db
+from src.cache import TTLCache, MemoryBackend, RedisBackend, redis_client
+from src.config import SECRET, JWT_USER_CLAIMS, JWT_CLAIMS_MAX_AGE, USER_CACHE_SIZE, USER_CACHE_TTL, AUTH_STRATEGY, TOKEN_LIFETIME, \
+    TOKEN_CACHE_BACKEND, TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL
 
 cookie_transport = CookieTransport(cookie_max_age=60*60*24)
 
-def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=SECRET, lifetime_seconds=3600)
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+_updated_at = {}
+
+def cache_user(user: User) -> None:
+    # column values only: an ORM instance belongs to the session that loaded it and must not be shared
+    state = inspect(user)
+    user_cache.set(user.id, {
+        attr.key: state.dict[attr.key] for attr in state.mapper.column_attrs if attr.key in state.dict
+    })
+
+def cached_user(user_id, session: Optional[AsyncSession] = None) -> Optional[User]:
+    """A new User for this request from the cached columns, or None on a miss.
+
+    With ``session`` the user is attached to it as an unmodified row, as if just
+    loaded, so an update through the user manager is an UPDATE of that row.
+    """
+    fields = user_cache.get(user_id)
+    if fields is None:
+        return None
+
+    if session is not None:
+        # resolved earlier in the same request, e.g. by a second current_user dependency
+        loaded = session.identity_map.get(identity_key(User, user_id))
+        if loaded is not None:
+            return loaded
+
+    user = User(**fields)
+    if session is not None:
+        make_transient_to_detached(user)
+        session.add(user)
+    return user
+
+def invalidate_user(user_id) -> None:
+    """Drop a user from the cache and stop trusting claims in tokens issued before now.
+
+    Both are per process; other workers notice the update once the claims are
+    older than JWT_CLAIMS_MAX_AGE and their cached copy (USER_CACHE_TTL) expires.
+    """
+    user_cache.delete(user_id)
+    _updated_at[user_id] = time.time()
+
+class ClaimsJWTStrategy(JWTStrategy):
+    CLAIMS = ("email", "username", "is_active", "is_superuser", "is_verified")
+
+    async def write_token(self, user: User) -> str:
+        if not JWT_USER_CLAIMS:
+            return await super().write_token(user)
+
+        data = {"sub": str(user.id), "aud": self.token_audience, "iat": int(time.time())}
+        data.update({claim: getattr(user, claim) for claim in self.CLAIMS})
+        return generate_jwt(data, self.encode_key, self.lifetime_seconds, algorithm=self.algorithm)
+
+    async def read_claims_user(self, token: Optional[str], user_manager) -> Optional[User]:
+        """Resolve the user from the cache or the token claims.
+
+        The user row is loaded instead when the claims are older than
+        JWT_CLAIMS_MAX_AGE or predate an update seen by this process.
+        """
+        if token is None:
+            return None
+
+        try:
+            data = decode_jwt(token, self.decode_key, self.token_audience, algorithms=[self.algorithm])
+            user_id = user_manager.parse_id(data["sub"])
+        except (jwt.PyJWTError, KeyError, exceptions.InvalidID):
+            return None
+
+        user = cached_user(user_id)
+        if user is not None:
+            return user
+
+        issued_at = data.get("iat", 0)
+        trusted = (
+            all(claim in data for claim in self.CLAIMS)
+            and issued_at > _updated_at.get(user_id, 0)
+            and time.time() - issued_at < JWT_CLAIMS_MAX_AGE
+        )
+        if trusted:
+            user = User(id=user_id, **{claim: data[claim] for claim in self.CLAIMS})
+        else:
+            try:
+                user = await user_manager.get(user_id)
+            except exceptions.UserNotExists:
+                return None
+
+        cache_user(user)
+        return user
+
+def get_jwt_strategy() -> ClaimsJWTStrategy:
+    return ClaimsJWTStrategy(secret=SECRET, lifetime_seconds=3600)
+
+if TOKEN_CACHE_BACKEND == "redis":
+    token_cache = RedisBackend(redis_client(), "token", ttl=TOKEN_CACHE_TTL)
+else:
+    token_cache = MemoryBackend(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+class CachedDatabaseStrategy(DatabaseStrategy):
+    """Revocable access tokens from the accesstoken table, looked up through ``token_cache``.
+
+    Logout evicts the token from the cache. With the in-memory cache, other
+    processes may keep accepting a revoked token for up to TOKEN_CACHE_TTL
+    seconds; the Redis cache makes revocation immediate everywhere.
+    """
+
+    async def read_token(self, token: Optional[str], user_manager) -> Optional[User]:
+        if token is None:
+            return None
+
+        entry = await token_cache.get(token)
+        if entry is None:
+            max_age = None
+            if self.lifetime_seconds:
+                max_age = datetime.now(timezone.utc) - timedelta(seconds=self.lifetime_seconds)
+
+            access_token = await self.database.get_by_token(token, max_age)
+            if access_token is None:
+                return None
+
+            expires_at = None
+            if self.lifetime_seconds:
+                expires_at = access_token.created_at.timestamp() + self.lifetime_seconds
+            entry = {"user_id": str(access_token.user_id), "expires_at": expires_at}
+            await token_cache.set(token, entry)
+
+        if entry["expires_at"] is not None and entry["expires_at"] < time.time():
+            await token_cache.delete(token)
+            return None
+
+        try:
+            user_id = user_manager.parse_id(entry["user_id"])
+        except exceptions.InvalidID:
+            return None
+
+        # the access token database shares the request's session with the user manager
+        user = cached_user(user_id, self.database.session)
+        if user is None:
+            try:
+                user = await user_manager.get(user_id)
+            except exceptions.UserNotExists:
+                return None
+            cache_user(user)
+
+        return user
+
+    async def destroy_token(self, token: str, user: User) -> None:
+        await token_cache.delete(token)
+        await super().destroy_token(token, user)
+
+def get_cached_database_strategy(access_token_db=Depends(get_access_token_db)) -> CachedDatabaseStrategy:
+    return CachedDatabaseStrategy(access_token_db, lifetime_seconds=TOKEN_LIFETIME)
 
 auth_backend = AuthenticationBackend(
     name="jwt",
     transport=cookie_transport,
-    get_strategy=get_jwt_strategy,
+    get_strategy=get_cached_database_strategy if AUTH_STRATEGY == "database" else get_jwt_strategy,
 )
@@ -0,0 +1,47 @@
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.models import AccessToken
+from src.config import TOKEN_LIFETIME, TOKEN_CLEANUP_BATCH
+from src.database import async_session_maker
+
+
+async def delete_expired_tokens(
+        session: AsyncSession, lifetime_seconds: int = TOKEN_LIFETIME, batch_size: int = TOKEN_CLEANUP_BATCH
+) -> int:
+    """Delete access tokens older than ``lifetime_seconds``, ``batch_size`` rows per transaction.
+
+    Short batches keep row locks and WAL bursts small while logins keep inserting.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=lifetime_seconds)
+    deleted = 0
+
+    while True:
+        expired = select(AccessToken.token).where(AccessToken.created_at < cutoff).limit(batch_size)
+        result = await session.execute(delete(AccessToken).where(AccessToken.token.in_(expired.scalar_subquery())))
+        await session.commit()
+
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.auth.commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+    purge = commands.add_parser("purge-tokens", help="delete expired access tokens")
+    purge.add_argument("--lifetime", type=int, default=TOKEN_LIFETIME, help="token lifetime in seconds")
+    purge.add_argument("--batch-size", type=int, default=TOKEN_CLEANUP_BATCH)
+    args = parser.parse_args(argv)
+
+    async with async_session_maker() as session:
+        if args.command == "purge-tokens":
+            print(f"deleted {await delete_expired_tokens(session, args.lifetime, args.batch_size)} tokens")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
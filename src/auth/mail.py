@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+from typing import Optional
+
+from celery import Celery
+
+from src.config import SMTP_HOST, SMTP_PORT, SMTP_SSL, SMTP_USER, SMTP_PASS, SMTP_POOL_SIZE, SMTP_IDLE_TIMEOUT, \
+    REDIS_HOST, REDIS_PORT, MAIL_BACKEND, MAIL_BATCH_SIZE, MAIL_RETRIES, MAIL_RETRY_DELAY
+
+logger = logging.getLogger(__name__)
+
+celery = Celery("tasks", broker=f"redis://{REDIS_HOST}:{REDIS_PORT}")
+
+
+def email_message(payload: dict) -> EmailMessage:
+    email = EmailMessage()
+    email["Subject"] = payload["subject"]
+    email["From"] = SMTP_USER
+    email["To"] = payload["to"]
+
+    email.set_content(
+        payload["body"],
+        subtype="html"
+    )
+
+    return email
+
+
+def smtp_connect() -> smtplib.SMTP:
+    server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) if SMTP_SSL else smtplib.SMTP(SMTP_HOST, SMTP_PORT)
+    if SMTP_USER:
+        server.login(SMTP_USER, SMTP_PASS)
+    return server
+
+
+class SMTPPool:
+    """Logged-in SMTP connections kept open between sends; connections idle longer than ``idle_timeout`` are dropped."""
+
+    def __init__(self, size: int = SMTP_POOL_SIZE, idle_timeout: float = SMTP_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def send_batch(self, payloads: list) -> list:
+        """Send the payloads over one connection and return the ones left unsent.
+
+        A failed send is retried once on a fresh connection; if that fails too the
+        server is treated as unavailable and the message and everything after it
+        are returned for a later retry. Messages the server refuses are only logged.
+        """
+        with self._slots:
+            server = None
+            try:
+                for index, payload in enumerate(payloads):
+                    email = email_message(payload)
+                    for attempt in range(2):
+                        try:
+                            if server is None:
+                                server = self._checkout() if attempt == 0 else smtp_connect()
+                            server.send_message(email)
+                            break
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+                            logger.exception("failed to send email to %s", payload["to"])
+                            break
+                        except OSError:
+                            if server is not None:
+                                self._close(server)
+                                server = None
+                            if attempt:
+                                logger.exception("SMTP server unavailable, %s emails unsent", len(payloads) - index)
+                                return payloads[index:]
+            except Exception:
+                if server is not None:
+                    self._close(server)
+                raise
+
+            if server is not None:
+                with self._lock:
+                    self._idle.append((server, time.monotonic()))
+            return []
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+
+        for server, _ in idle:
+            self._close(server)
+
+    def _checkout(self) -> smtplib.SMTP:
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                server, used_at = self._idle.pop()
+                if now - used_at < self.idle_timeout:
+                    return server
+                self._close(server)
+
+        return smtp_connect()
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+
+smtp_pool = SMTPPool()
+
+
+@celery.task(bind=True, name="send_email", max_retries=MAIL_RETRIES)
+def send_email(self, payload: dict) -> None:
+    if smtp_pool.send_batch([payload]):
+        raise self.retry(countdown=MAIL_RETRY_DELAY * 2 ** self.request.retries)
+
+
+class MailQueue:
+    """In-process fallback for Celery: background tasks sending queued emails in batches from worker threads.
+
+    Emails the SMTP server could not take are put back after an exponential
+    backoff, up to ``retries`` times.
+    """
+
+    def __init__(self, workers: int = SMTP_POOL_SIZE, batch_size: int = MAIL_BATCH_SIZE,
+                 retries: int = MAIL_RETRIES, retry_delay: float = MAIL_RETRY_DELAY):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    def put(self, payload: dict, attempts: int = 0) -> None:
+        if not self._tasks:
+            self._queue = asyncio.Queue()
+            self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+        self._queue.put_nowait((payload, attempts))
+
+    async def stop(self, timeout: float = 10) -> None:
+        if not self._tasks:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("dropping %s unsent emails", self._queue.qsize())
+
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        await asyncio.to_thread(smtp_pool.close)
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                unsent = await asyncio.to_thread(smtp_pool.send_batch, [payload for payload, _ in batch])
+                if unsent:
+                    await self._retry(batch[len(batch) - len(unsent):])
+            except Exception:
+                logger.exception("failed to send %s emails", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _retry(self, batch: list) -> None:
+        """Requeue unsent emails after a backoff; the batch stays unfinished meanwhile, so ``stop`` waits for it."""
+        retry = [(payload, attempts + 1) for payload, attempts in batch if attempts < self.retries]
+        if len(retry) < len(batch):
+            logger.error("giving up on %s emails after %s attempts", len(batch) - len(retry), self.retries + 1)
+        if not retry:
+            return
+
+        await asyncio.sleep(self.retry_delay * 2 ** min(attempts for _, attempts in batch))
+        for item in retry:
+            self._queue.put_nowait(item)
+
+
+mail_queue = MailQueue()
+
+
+async def dispatch_email(subject: str, to: str, body: str) -> None:
+    """Hand an email to the configured backend without waiting for SMTP."""
+    payload = {"subject": subject, "to": to, "body": body}
+
+    if MAIL_BACKEND == "celery":
+        await asyncio.to_thread(send_email.delay, payload)
+    else:
+        mail_queue.put(payload)
@@ -1,65 +1,85 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from fastapi import Depends, Request
-from fastapi_users import BaseUserManager, UUIDIDMixin
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi_users import BaseUserManager, UUIDIDMixin, exceptions, schemas
 
+from src.auth.base_config import invalidate_user
+from src.auth.mail import dispatch_email
 from src.auth.models import User, get_user_db
+from src.auth.passwords import hash_async, verify_async
 
-from src.config import SECRET, SMTP_USER, SMTP_PASS, REDIS_HOST, REDIS_PORT
-
-import smtplib
-from email.message import EmailMessage
-
-from celery import Celery
-
-celery = Celery("tasks", broker=f"redis://{REDIS_HOST}:{REDIS_PORT}")
+from src.config import SECRET
 
 class UserManager(UUIDIDMixin, BaseUserManager[User, int]):
+    """Hashing and verification run in the password executor instead of on the event loop.
+
+    ``create``, ``authenticate`` and ``_update`` mirror the fastapi-users
+    implementations apart from that.
+    """
     reset_password_token_secret = SECRET
     verification_token_secret = SECRET
 
+    async def create(
+        self, user_create: schemas.UC, safe: bool = False, request: Optional[Request] = None
+    ) -> User:
+        await self.validate_password(user_create.password, user_create)
+
+        existing_user = await self.user_db.get_by_email(user_create.email)
+        if existing_user is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = user_create.create_update_dict() if safe else user_create.create_update_dict_superuser()
+        password = user_dict.pop("password")
+        user_dict["hashed_password"] = await hash_async(password)
+
+        created_user = await self.user_db.create(user_dict)
+        await self.on_after_register(created_user, request)
+
+        return created_user
+
+    async def authenticate(self, credentials: OAuth2PasswordRequestForm) -> Optional[User]:
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # still pay for a hash so unknown emails take as long as wrong passwords
+            await hash_async(credentials.password)
+            return None
+
+        verified, updated_password_hash = await verify_async(credentials.password, user.hashed_password)
+        if not verified:
+            return None
+        if updated_password_hash is not None:
+            await self.user_db.update(user, {"hashed_password": updated_password_hash})
+
+        return user
+
+    async def _update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        update_dict = dict(update_dict)
+        password = update_dict.pop("password", None)
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict["hashed_password"] = await hash_async(password)
+
+        return await super()._update(user, update_dict)
+
     async def on_after_register(
         self, user: User, request: Optional[Request] = None
     ) -> None:
-        email = SendingEmail("Регистрация", user, f"Пользователь {user.id} зарегистрирован")
-        email.send_email(email)
+        await dispatch_email("Регистрация", user.email, f"Пользователь {user.id} зарегистрирован")
 
     async def on_after_forgot_password(
         self, user: User, token: str, request: Optional[Request] = None
     ) -> None:
-        email = SendingEmail("Восстановление пароля", user, f"<h1>Здравствуйте!</h1> ваш токен: <b>{token}</b>")
-        email.send_email(email)
+        await dispatch_email("Восстановление пароля", user.email, f"<h1>Здравствуйте!</h1> ваш токен: <b>{token}</b>")
+
+    async def on_after_update(
+        self, user: User, update_dict: Dict[str, Any], request: Optional[Request] = None
+    ) -> None:
+        invalidate_user(user.id)
+
+    async def on_after_delete(self, user: User, request: Optional[Request] = None) -> None:
+        invalidate_user(user.id)
 
 async def get_user_manager(user_db=Depends(get_user_db)):
     yield UserManager(user_db)
-
-class SendingEmail:
-    SMTP_HOST = "smtp.gmail.com"
-    SMTP_PORT = 465
-    SMTP_USER = SMTP_USER
-    SMTP_PASS = SMTP_PASS
-
-    def __init__(self, subject: str, user: User, msg: str):
-        self.subject = subject
-        self.user = user
-        self.msg = msg
-
-    def email_message(self):
-        email = EmailMessage()
-        email["Subject"] = self.subject
-        email["From"] = SMTP_USER
-        email["To"] = self.user.email
-
-        email.set_content(
-            self.msg,
-            subtype="html"
-        )
-
-        return email
-
-    @celery.task
-    def send_email(self):
-        self.email = self.email_message()
-        with smtplib.SMTP_SSL(self.SMTP_HOST, self.SMTP_PORT) as server:
-            server.login(self.SMTP_USER, self.SMTP_PASS)
-            server.send_message(self.email)
\ No newline at end of file
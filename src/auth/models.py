@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi_users.authentication.strategy.db import AccessTokenDatabase, DatabaseStrategy
 from sqlalchemy.orm import Mapped, mapped_column
 
+from src.config import TOKEN_LIFETIME
 from src.database import Base, get_async_session
 
 class AccessToken(SQLAlchemyBaseAccessTokenTableUUID, Base):
@@ -33,4 +34,4 @@ async def get_access_token_db(session: AsyncSession = Depends(get_async_session)
 def get_database_strategy(
         access_token_db: AccessTokenDatabase[AccessToken] = Depends(get_access_token_db),
 ) -> DatabaseStrategy:
-    return DatabaseStrategy(access_token_db, lifetime_seconds=60*60*24)
\ No newline at end of file
+    return DatabaseStrategy(access_token_db, lifetime_seconds=TOKEN_LIFETIME)
\ No newline at end of file
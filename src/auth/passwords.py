@@ -0,0 +1,36 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from fastapi_users.password import PasswordHelper
+
+from src.config import PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS
+
+_helper = PasswordHelper()
+
+
+# module-level so they can be pickled into a process pool
+def hash_password(password: str) -> str:
+    return _helper.hash(password)
+
+
+def verify_password(password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return _helper.verify_and_update(password, hashed_password)
+
+
+def make_executor() -> Executor:
+    if PASSWORD_HASH_EXECUTOR == "process":
+        return ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+    return ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+executor = make_executor()
+
+
+async def hash_async(password: str) -> str:
+    """Hash off the event loop; at most PASSWORD_HASH_WORKERS hashes run at once."""
+    return await asyncio.get_running_loop().run_in_executor(executor, hash_password, password)
+
+
+async def verify_async(password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return await asyncio.get_running_loop().run_in_executor(executor, verify_password, password, hashed_password)
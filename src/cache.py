@@ -0,0 +1,112 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from src.config import REDIS_HOST, REDIS_PORT
+
+
+class TTLCache:
+    """In-process LRU cache whose entries also expire ``ttl`` seconds after they were set."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        value, expires_at = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MemoryBackend:
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value)
+
+    async def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+
+class RedisBackend:
+    """Values are stored as JSON with a TTL; eviction beyond that is left to the server's maxmemory policy."""
+
+    def __init__(self, client, prefix: str, ttl: float = 60):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Any:
+        raw = await self.client.get(f"{self.prefix}:{key}")
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.client.set(f"{self.prefix}:{key}", json.dumps(value), ex=int(self.ttl))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(f"{self.prefix}:{key}")
+
+
+class PageCache:
+    """Cache of rendered pages keyed by the version of the data they were built from.
+
+    Read the version from the database before building the page: a page is then
+    never stored under a version older than its content, and writes need no
+    invalidation step. Every worker sees the new version on its next read and
+    misses; pages of old versions age out through the backend's LRU and TTL.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, version, *parts) -> tuple[str, Any]:
+        key = ":".join(map(str, (version, *parts)))
+        value = await self.backend.get(key)
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return key, value
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.backend.set(key, value)
+
+
+def redis_client():
+    import redis.asyncio as redis
+
+    return redis.Redis(host=REDIS_HOST, port=int(REDIS_PORT))
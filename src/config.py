@@ -8,11 +8,70 @@ DB_PORT = os.environ.get("DB_PORT")
 DB_NAME = os.environ.get("DB_NAME")
 DB_USER = os.environ.get("DB_USER")
 DB_PASS = os.environ.get("DB_PASS")
+DATABASE_URL = os.environ.get(
+    "DATABASE_URL", f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
 
 SECRET = os.environ.get("SECRET")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
 
 SMTP_USER = os.environ.get("SMTP_USER")
 SMTP_PASS = os.environ.get("SMTP_PASS")
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", 465))
+SMTP_SSL = os.environ.get("SMTP_SSL", "true").lower() == "true"
+SMTP_POOL_SIZE = int(os.environ.get("SMTP_POOL_SIZE", 2))
+SMTP_IDLE_TIMEOUT = float(os.environ.get("SMTP_IDLE_TIMEOUT", 60))
+MAIL_BACKEND = os.environ.get("MAIL_BACKEND", "queue")
+MAIL_BATCH_SIZE = int(os.environ.get("MAIL_BATCH_SIZE", 50))
+MAIL_RETRIES = int(os.environ.get("MAIL_RETRIES", 5))
+MAIL_RETRY_DELAY = float(os.environ.get("MAIL_RETRY_DELAY", 5))
 
 REDIS_HOST = os.environ.get("REDIS_HOST")
 REDIS_PORT = os.environ.get("REDIS_PORT")
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", -1))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "false").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 100))
+
+DB_REPLICA_URLS = [url for url in os.environ.get("DB_REPLICA_URLS", "").split(",") if url]
+DB_REPLICA_RETRY = float(os.environ.get("DB_REPLICA_RETRY", 30))
+
+JWT_USER_CLAIMS = os.environ.get("JWT_USER_CLAIMS", "false").lower() == "true"
+JWT_CLAIMS_MAX_AGE = float(os.environ.get("JWT_CLAIMS_MAX_AGE", 300))
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", 30))
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 10000))
+
+DEBUG = os.environ.get("DEBUG", "false").lower() == "true"
+TEMPLATE_CACHE_DIR = os.environ.get("TEMPLATE_CACHE_DIR")
+TEMPLATE_STREAMING = os.environ.get("TEMPLATE_STREAMING", "false").lower() == "true"
+
+FEED_CACHE_BACKEND = os.environ.get("FEED_CACHE_BACKEND", "memory")
+# rendered feed pages kept per worker, each at most 100 posts since /feed-posts caps limit there
+FEED_CACHE_SIZE = int(os.environ.get("FEED_CACHE_SIZE", 256))
+FEED_CACHE_TTL = float(os.environ.get("FEED_CACHE_TTL", 60))
+
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_IP_FACTOR = float(os.environ.get("RATE_LIMIT_IP_FACTOR", 5))
+TRUSTED_PROXIES = [proxy for proxy in os.environ.get("TRUSTED_PROXIES", "").split(",") if proxy]
+LIKE_RATE = float(os.environ.get("LIKE_RATE", 2))
+LIKE_BURST = int(os.environ.get("LIKE_BURST", 20))
+POST_RATE = float(os.environ.get("POST_RATE", 0.2))
+POST_BURST = int(os.environ.get("POST_BURST", 5))
+
+QUERY_AUDIT = os.environ.get("QUERY_AUDIT", "false").lower() == "true"
+QUERY_AUDIT_SLOW_MS = float(os.environ.get("QUERY_AUDIT_SLOW_MS", 100))
+QUERY_AUDIT_REPEAT = int(os.environ.get("QUERY_AUDIT_REPEAT", 3))
+
+PASSWORD_HASH_EXECUTOR = os.environ.get("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+
+AUTH_STRATEGY = os.environ.get("AUTH_STRATEGY", "jwt")
+TOKEN_LIFETIME = int(os.environ.get("TOKEN_LIFETIME", 60*60*24))
+TOKEN_CACHE_BACKEND = os.environ.get("TOKEN_CACHE_BACKEND", "memory")
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL = float(os.environ.get("TOKEN_CACHE_TTL", 60))
+TOKEN_CLEANUP_BATCH = int(os.environ.get("TOKEN_CLEANUP_BATCH", 1000))
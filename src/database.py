@@ -1,20 +1,113 @@
+import itertools
+import time
 from typing import AsyncGenerator
 
 from sqlalchemy import MetaData
+from sqlalchemy.exc import DBAPIError, TimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from src.config import DB_HOST, DB_PASS, DB_USER, DB_NAME, DB_PORT
-
-DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+from src.config import DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, \
+    DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE, DB_REPLICA_URLS, DB_REPLICA_RETRY
 
 Base = declarative_base()
 metadata = MetaData()
 
-engine = create_async_engine(DATABASE_URL)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that also counts checkouts which had to wait for a connection to be returned."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        if self.checkedin() or self._max_overflow == -1 or self.overflow() < self._max_overflow:
+            return super()._do_get()
+
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waits += 1
+            self.wait_time += time.perf_counter() - start
+
+
+def make_engine(url: str):
+    connect_args = {}
+    if url.startswith("postgresql+asyncpg"):
+        connect_args = {
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        }
+
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+engine = make_engine(DATABASE_URL)
 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+replica_engines = [make_engine(url) for url in DB_REPLICA_URLS]
+replica_session_makers = [
+    sessionmaker(replica, class_=AsyncSession, expire_on_commit=False) for replica in replica_engines
+]
+_next_replica = itertools.cycle(range(len(replica_session_makers)))
+_replica_failed_at = {}
+
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only handlers: replicas in round-robin order, the primary if none is reachable.
+
+    A replica that fails to connect, or whose pool has no connection to hand out
+    within its timeout, is skipped for DB_REPLICA_RETRY seconds.
+    """
+    for _ in range(len(replica_session_makers)):
+        index = next(_next_replica)
+        if time.monotonic() - _replica_failed_at.get(index, float("-inf")) < DB_REPLICA_RETRY:
+            continue
+
+        session = replica_session_makers[index]()
+        try:
+            await session.connection()
+        except (OSError, DBAPIError, TimeoutError):
+            _replica_failed_at[index] = time.monotonic()
+            await session.close()
+            continue
+
+        async with session:
+            yield session
+        return
+
+    async with async_session_maker() as session:
+        yield session
+
+def pool_status(pool=None) -> dict:
+    pool = pool or engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "waits": pool.waits,
+        "wait_time": round(pool.wait_time, 6),
+        "timeouts": pool.timeouts,
+    }
@@ -1,12 +1,29 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse
 from starlette.middleware.cors import CORSMiddleware
 
 from src.auth.schemas import UserRead, UserCreate, UserUpdate
 from src.posts.router import router as post_router
+from src.database import engine, pool_status, replica_engines
+from src.metrics import MetricsMiddleware, instrument_engine, registry
+from src.auth.mail import mail_queue
+from src.auth.passwords import executor as password_executor
+from src.posts.cache import feed_cache
 
 from src.app import *
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await mail_queue.stop()
+    password_executor.shutdown(wait=False)
+
+app = FastAPI(lifespan=lifespan)
+
+for db_engine in (engine, *replica_engines):
+    instrument_engine(db_engine)
 
 app.include_router(
     fastapi_users.get_auth_router(auth_backend),
@@ -44,7 +61,29 @@ app.add_middleware(
     allow_methods=["GET", 'POST', 'OPTIONS', 'DELETE', 'PATCH', 'PUT', "HEAD"],
     allow_headers=['Content-Type', 'Set-Cookie', 'Access-Control-Allow-Headers', 'Access-Control-Allow-Origin'],
 )
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/authenticated-route")
 async def authenticated_route(user: User = Depends(current_active_user)):
-    return {"message": f"Hello {user.username}!"}
\ No newline at end of file
+    return {"message": f"Hello {user.username}!"}
+
+@app.get("/pool-stats", dependencies=[Depends(operator_access)])
+async def pool_stats():
+    return {**pool_status(), "replicas": [pool_status(replica.pool) for replica in replica_engines]}
+
+@app.get("/cache-stats", dependencies=[Depends(operator_access)])
+async def cache_stats():
+    return {"feed": {"hits": feed_cache.hits, "misses": feed_cache.misses}}
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(operator_access)])
+async def metrics():
+    pools = [("primary", pool_status())]
+    pools += [(f"replica{index}", pool_status(replica.pool)) for index, replica in enumerate(replica_engines)]
+    gauges = {
+        f"db_pool_{field}": (f"Connection pool {field.replace('_', ' ')}.", [({"pool": name}, stats[field]) for name, stats in pools])
+        for field in ("size", "checked_in", "checked_out", "overflow", "waits", "wait_time", "timeouts")
+    }
+    gauges["feed_cache_requests"] = ("Feed page cache lookups by result.", [
+        ({"result": "hit"}, feed_cache.hits), ({"result": "miss"}, feed_cache.misses),
+    ])
+    return PlainTextResponse(registry.render(gauges), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,179 @@
+import bisect
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from src import audit
+from src.config import QUERY_AUDIT
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: dict):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f"{name}_bucket", {**labels, "le": str(bound)}, cumulative
+        yield f"{name}_bucket", {**labels, "le": "+Inf"}, self.count
+        yield f"{name}_sum", labels, self.sum
+        yield f"{name}_count", labels, self.count
+
+
+class RequestStats:
+    __slots__ = ("queries", "query_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class Registry:
+    def __init__(self):
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+        self.query_time = defaultdict(float)
+        self.responses = defaultdict(int)
+        self.statements = Histogram(LATENCY_BUCKETS)
+
+    def observe_request(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats) -> None:
+        self.latency[method, route].observe(elapsed)
+        self.queries[method, route].observe(stats.queries)
+        self.query_time[method, route] += stats.query_time
+        self.responses[method, route, status] += 1
+
+    def render(self, gauges: Optional[dict] = None) -> str:
+        """Everything recorded so far in the Prometheus text exposition format."""
+        lines = []
+
+        def family(name: str, kind: str, help: str, samples) -> None:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample, labels, value in samples:
+                lines.append(f"{sample}{_labels(labels)} {value}")
+
+        family("http_requests_total", "counter", "Responses by route and status.", (
+            ("http_requests_total", {"method": method, "route": route, "status": status}, count)
+            for (method, route, status), count in self.responses.items()
+        ))
+        family("http_request_duration_seconds", "histogram", "Request latency by route.", (
+            sample for (method, route), histogram in self.latency.items()
+            for sample in histogram.samples("http_request_duration_seconds", {"method": method, "route": route})
+        ))
+        family("http_request_db_queries", "histogram", "Database statements issued per request.", (
+            sample for (method, route), histogram in self.queries.items()
+            for sample in histogram.samples("http_request_db_queries", {"method": method, "route": route})
+        ))
+        family("http_request_db_seconds_total", "counter", "Time spent in database statements by route.", (
+            ("http_request_db_seconds_total", {"method": method, "route": route}, seconds)
+            for (method, route), seconds in self.query_time.items()
+        ))
+        family("db_statement_duration_seconds", "histogram", "Latency of individual database statements.",
+               self.statements.samples("db_statement_duration_seconds", {}))
+
+        for name, (help, values) in (gauges or {}).items():
+            family(name, "gauge", help, ((name, labels, value) for labels, value in values))
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+registry = Registry()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and DB statement counts per matched route.
+
+    With QUERY_AUDIT enabled each request's statements are also audited and
+    repeated or slow ones are logged.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            if QUERY_AUDIT:
+                with audit.audit_queries() as request_audit:
+                    await self.app(scope, receive, send_with_status)
+            else:
+                await self.app(scope, receive, send_with_status)
+        finally:
+            _request_stats.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            registry.observe_request(scope["method"], route, status, time.perf_counter() - start, stats)
+            if QUERY_AUDIT:
+                audit.warn(request_audit, f"{scope['method']} {route}")
+
+
+# the start time lives on the statement's execution context rather than the connection,
+# so a statement that fails before after_cursor_execute leaves nothing behind
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.metrics_start
+    registry.statements.observe(elapsed)
+    audit.record(statement, elapsed)
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_time += elapsed
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement run on ``engine`` (sync or async) and attribute it to the current request and audit.
+
+    Instrumenting the same engine again is a no-op.
+    """
+    engine = getattr(engine, "sync_engine", engine)
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,191 @@
+import csv
+import io
+import json
+import zlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_read_session
+from src.posts.counters import POSTS, FEED, increment
+from src.posts.models import Post, Like, POST_COLUMNS
+from src.posts.responses import dumps
+from src.posts.schemas import PostCreate
+
+# rows reported back per category; the totals are always exact
+MAX_REPORTED = 1000
+# each row binds 6 parameters (defaults included) and asyncpg allows 32767 per statement
+MAX_BATCH_SIZE = 5000
+MAX_HEAD_LENGTH = Post.head.type.length
+# longest NDJSON line buffered; longer ones are reported as errors without being read into memory
+MAX_LINE_LENGTH = 1024 * 1024
+
+EXPORTS = {
+    "post": POST_COLUMNS,
+    "like": (Like.id, Like.user_id, Like.post_id),
+}
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+async def iter_ndjson(
+        chunks: AsyncIterator[bytes], max_length: int = MAX_LINE_LENGTH
+) -> AsyncIterator[tuple[int, Optional[bytes]]]:
+    """Split a byte stream into (line number, line) pairs, holding at most ``max_length`` bytes of a partial line.
+
+    A line longer than that is yielded as (line number, None) and dropped up to
+    its newline. Every chunk is scanned once, so long lines stay linear.
+    """
+    parts, size, too_long = [], 0, False
+    line_no = 0
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            part = chunk[start:] if end == -1 else chunk[start:end]
+            if not too_long:
+                size += len(part)
+                if size > max_length:
+                    parts, too_long = [], True
+                else:
+                    parts.append(part)
+            if end == -1:
+                break
+
+            line_no += 1
+            line = None if too_long else b"".join(parts)
+            if line is None or line.strip():
+                yield line_no, line
+            parts, size, too_long = [], 0, False
+            start = end + 1
+
+    line = None if too_long else b"".join(parts)
+    if line is None or line.strip():
+        yield line_no + 1, line
+
+
+async def import_posts(
+        session: AsyncSession, lines: AsyncIterator[tuple[int, Optional[bytes]]], user_id, batch_size: int = 1000
+) -> dict:
+    """Insert NDJSON posts in multi-row batches, one transaction per batch.
+
+    Rows whose head already exists (in the table or earlier in the same batch) are
+    skipped with ON CONFLICT DO NOTHING and reported as conflicts by line number.
+    Rows the database would reject are reported as errors before inserting; a batch
+    that fails anyway is rolled back and reported as errors over its line range, and
+    the import goes on with the next batch.
+    """
+    batch_size = min(batch_size, MAX_BATCH_SIZE)
+    report = {"inserted": 0, "conflicts": {"total": 0, "lines": []}, "errors": {"total": 0, "lines": []}}
+    batch = []
+
+    async for line_no, line in lines:
+        if line is None:
+            _report(report["errors"], {"line": line_no, "detail": f"line is longer than {MAX_LINE_LENGTH} bytes"})
+            continue
+
+        try:
+            post = PostCreate(**json.loads(line))
+            _check_storable(post)
+        except (ValueError, TypeError) as error:
+            _report(report["errors"], {"line": line_no, "detail": str(error)})
+            continue
+
+        batch.append((line_no, post))
+        if len(batch) >= batch_size:
+            await _insert_batch(session, batch, user_id, report)
+            batch = []
+
+    if batch:
+        await _insert_batch(session, batch, user_id, report)
+
+    return report
+
+
+async def _insert_batch(session: AsyncSession, batch: list, user_id, report: dict) -> None:
+    rows, seen = [], set()
+    for line_no, post in batch:
+        if post.head in seen:
+            _report(report["conflicts"], {"line": line_no, "head": post.head})
+            continue
+        seen.add(post.head)
+        rows.append((line_no, post))
+
+    stmt = (
+        pg_insert(Post)
+        .values([{"head": post.head, "description": post.description, "user_id": user_id} for _, post in rows])
+        .on_conflict_do_nothing(index_elements=["head"])
+        .returning(Post.head)
+    )
+    try:
+        result = await session.execute(stmt)
+        inserted = set(result.scalars().all())
+
+        if inserted:
+            await session.execute(increment({POSTS: len(inserted), FEED: 1}))
+
+        await session.commit()
+    except DBAPIError as error:
+        await session.rollback()
+        _report(report["errors"], {
+            "line": batch[0][0], "last_line": batch[-1][0], "detail": str(error.orig),
+        }, rows=len(rows))
+        return
+
+    for line_no, post in rows:
+        if post.head not in inserted:
+            _report(report["conflicts"], {"line": line_no, "head": post.head})
+
+    report["inserted"] += len(inserted)
+
+
+def _check_storable(post: PostCreate) -> None:
+    if len(post.head) > MAX_HEAD_LENGTH:
+        raise ValueError(f"head is longer than {MAX_HEAD_LENGTH} characters")
+    if "\x00" in post.head or "\x00" in post.description:
+        raise ValueError("NUL characters are not allowed")
+
+
+def _report(section: dict, row: dict, rows: int = 1) -> None:
+    section["total"] += rows
+    if len(section["lines"]) < MAX_REPORTED:
+        section["lines"].append(row)
+
+
+async def export_rows(table: str, format: str = "ndjson", compress: bool = False, yield_per: int = 1000):
+    """Stream a whole table as NDJSON or CSV bytes, optionally gzipped, in constant memory.
+
+    Rows come from a server-side cursor ``yield_per`` at a time. The session is
+    opened here rather than taken from a request dependency because it has to
+    stay open for as long as the response is being streamed.
+    """
+    columns = EXPORTS[table]
+    gzip = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+
+    async with asynccontextmanager(get_read_session)() as session:
+        query = select(*columns).order_by(columns[0]).execution_options(yield_per=yield_per)
+        result = await session.stream(query)
+
+        if format == "csv":
+            yield _encode([[column.name for column in columns]], format, gzip)
+
+        async for rows in result.partitions():
+            yield _encode(rows, format, gzip)
+
+    if gzip is not None:
+        yield gzip.flush()
+
+
+def _encode(rows, format: str, gzip) -> bytes:
+    if format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        data = buffer.getvalue().encode()
+    else:
+        data = b"".join(dumps(dict(row._mapping)) + b"\n" for row in rows)
+
+    return gzip.compress(data) if gzip is not None else data
@@ -0,0 +1,7 @@
+from src.cache import PageCache, MemoryBackend, RedisBackend, redis_client
+from src.config import FEED_CACHE_BACKEND, FEED_CACHE_SIZE, FEED_CACHE_TTL
+
+if FEED_CACHE_BACKEND == "redis":
+    feed_cache = PageCache(RedisBackend(redis_client(), "feed", ttl=FEED_CACHE_TTL))
+else:
+    feed_cache = PageCache(MemoryBackend(maxsize=FEED_CACHE_SIZE, ttl=FEED_CACHE_TTL))
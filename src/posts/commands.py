@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import async_session_maker
+from src.posts.models import Post, Like
+from src.posts.bulk import iter_ndjson, import_posts, export_rows, EXPORTS, EXPORT_FORMATS
+
+
+async def reconcile_like_counts(session: AsyncSession) -> int:
+    """Recompute Post.like_count from the like table, touching only rows that drifted."""
+    likes = select(func.count(Like.id)).where(Like.post_id == Post.id).scalar_subquery()
+    stmt = update(Post).where(Post.like_count != likes).values(like_count=likes)
+    result = await session.execute(stmt.execution_options(synchronize_session=False))
+    await session.commit()
+
+    return result.rowcount
+
+
+async def read_chunks(path: str, size: int = 1 << 16):
+    with (sys.stdin.buffer if path == "-" else open(path, "rb")) as file:
+        for chunk in iter(lambda: file.read(size), b""):
+            yield chunk
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.posts.commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("reconcile-likes", help="recompute post like counts")
+    importer = commands.add_parser("import-posts", help="bulk insert posts from an NDJSON file ('-' for stdin)")
+    importer.add_argument("path")
+    importer.add_argument("--user-id", type=uuid.UUID, required=True)
+    importer.add_argument("--batch-size", type=int, default=1000)
+    exporter = commands.add_parser("export", help="stream a table to stdout")
+    exporter.add_argument("table", choices=EXPORTS)
+    exporter.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    exporter.add_argument("--gzip", action="store_true")
+    args = parser.parse_args(argv)
+
+    async with async_session_maker() as session:
+        if args.command == "reconcile-likes":
+            print(f"fixed {await reconcile_like_counts(session)} posts")
+        elif args.command == "import-posts":
+            report = await import_posts(session, iter_ndjson(read_chunks(args.path)), args.user_id, args.batch_size)
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+        elif args.command == "export":
+            async for chunk in export_rows(args.table, args.format, args.gzip):
+                sys.stdout.buffer.write(chunk)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
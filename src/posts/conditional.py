@@ -0,0 +1,44 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+import starlette.status as status
+
+
+def make_etag(*parts) -> str:
+    return 'W/"%s"' % hashlib.md5(":".join(map(str, parts)).encode()).hexdigest()
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+    return headers
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """304 response if the request's validators still match, following RFC 9110 precedence.
+
+    Without ``last_modified`` only If-None-Match is honoured.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+
+    if if_none_match is not None:
+        fresh = if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+    elif if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            fresh = last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+        except (TypeError, ValueError):
+            fresh = False
+    else:
+        fresh = False
+
+    if fresh:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, last_modified))
+
+    return None
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, update, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.posts.models import Post, Counter
+
+POSTS = "post"
+FEED = "feed"
+
+
+def increment(deltas: dict[str, int]):
+    """UPDATE statement adding ``deltas`` to the named counters; execute it in the same transaction as the write it counts.
+
+    The rows are locked in name order by one statement, so writers touching several
+    counters cannot deadlock each other.  Every write should touch the counters
+    through a single call.
+    """
+    locked = select(Counter.name).where(Counter.name.in_(deltas)).order_by(Counter.name).with_for_update()
+    return (
+        update(Counter).where(Counter.name.in_(locked.scalar_subquery()))
+        .values(value=Counter.value + case(deltas, value=Counter.name, else_=0), updated_at=datetime.utcnow())
+    )
+
+
+async def post_count(session: AsyncSession) -> int:
+    value = await session.scalar(select(Counter.value).where(Counter.name == POSTS))
+
+    if value is None:
+        value = await session.scalar(select(func.count()).select_from(Post))
+
+    return value
+
+
+async def feed_version(session: AsyncSession) -> tuple[Optional[int], Optional[datetime]]:
+    """Version and time of the last post write; likes are tracked per post (``Post.liked_at``) instead."""
+    result = await session.execute(select(Counter.value, Counter.updated_at).where(Counter.name == FEED))
+    row = result.first()
+
+    return (row.value, row.updated_at) if row else (None, None)
@@ -1,16 +1,33 @@
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 from src.database import Base
 from src.auth.models import User
 
-from sqlalchemy import ForeignKey, Column, TIMESTAMP, String, Integer, UUID, ForeignKeyConstraint
+from sqlalchemy import ForeignKey, Column, TIMESTAMP, String, Integer, BigInteger, UUID, ForeignKeyConstraint, Index, UniqueConstraint, \
+    Computed, Text
+from sqlalchemy.ext.compiler import compiles
 
 from datetime import datetime
 
+class PostgresComputed(Computed):
+    """Generated column expression that only exists on Postgres.
+
+    SQLite test databases get a plain nullable column instead, which the
+    in-process search fallback never reads.
+    """
+
+@compiles(PostgresComputed, "sqlite")
+def _skip_computed(element, compiler, **kw):
+    return ""
+
 class Post(Base):
     __tablename__ = "post"
     __table_args__ = (
         ForeignKeyConstraint(['user_id'], ['user.id']),
+        Index("ix_post_edit_at_id", "edit_at", "id"),
+        Index("ix_post_search", "search", postgresql_using="gin"),
+        Index("ix_post_user_id_edit_at_id", "user_id", "edit_at", "id"),
         {"extend_existing": True},
     )
 
@@ -20,17 +37,37 @@ class Post(Base):
     created_at = Column(TIMESTAMP, default=datetime.utcnow)
     edit_at = Column(TIMESTAMP, default=datetime.utcnow)
     user_id = Column(UUID, nullable=False)
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    liked_at = Column(TIMESTAMP, nullable=True)
+    search = deferred(Column(
+        TSVECTOR().with_variant(Text(), "sqlite"),
+        PostgresComputed("to_tsvector('simple', head || ' ' || description)", persisted=True),
+    ))
 
     like = relationship("Like", backref="liketable")
 
+POST_COLUMNS = (Post.id, Post.head, Post.description, Post.created_at, Post.edit_at, Post.user_id, Post.like_count)
+
 class Like(Base):
     __tablename__ = "like"
     __table_args__ = (
             ForeignKeyConstraint(['user_id'], ['user.id']),
             ForeignKeyConstraint(['post_id'], ['post.id']),
+            UniqueConstraint('user_id', 'post_id', name='uq_like_user_id_post_id'),
+            Index("ix_like_post_id", "post_id"),
             {"extend_existing": True},
         )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(UUID, nullable=False)
-    post_id = Column(Integer, nullable=False)
\ No newline at end of file
+    post_id = Column(Integer, nullable=False)
+
+class Counter(Base):
+    __tablename__ = "counter"
+    __table_args__ = (
+        {"extend_existing": True},
+    )
+
+    name = Column(String(length=64), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, default=datetime.utcnow)
\ No newline at end of file
@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.posts.models import Post
+
+NEXT = "next"
+PREV = "prev"
+
+
+def encode_cursor(edit_at: datetime, id: int, direction: str = NEXT) -> str:
+    raw = json.dumps([edit_at.isoformat(), id, direction])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int, str]:
+    try:
+        edit_at, id, direction = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if direction not in (NEXT, PREV):
+            raise ValueError
+        edit_at = datetime.fromisoformat(edit_at)
+        # edit_at is stored as naive UTC, so an offset in the cursor is applied here rather than by the driver
+        if edit_at.tzinfo is not None:
+            edit_at = edit_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return edit_at, int(id), direction
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail={
+            "status": "not success",
+            "detail": "invalid cursor",
+            "data": None,
+        })
+
+
+def _post(row):
+    # select(Post) rows wrap the entity, column-level selects expose edit_at/id directly
+    return row[0] if isinstance(row[0], Post) else row
+
+
+async def fetch_page(
+        session: AsyncSession, query: Select, limit: int = 10, page: int = 1, cursor: Optional[str] = None
+) -> tuple[list, Optional[str], Optional[str]]:
+    """Return one feed page ordered by (edit_at DESC, id DESC) plus next/prev cursors.
+
+    ``query`` may select the Post entity or individual Post columns including edit_at and id.
+    With a cursor only ``limit`` rows past the cursor key are read, so the cost does
+    not depend on how deep into the feed the page is.  Without one the page number
+    is used as a plain OFFSET, which keeps old ``/feed-posts/{page}`` links working.
+    """
+    key = tuple_(Post.edit_at, Post.id)
+
+    if cursor is None:
+        direction = NEXT
+        query = query.order_by(Post.edit_at.desc(), Post.id.desc()).offset((page-1)*limit)
+    else:
+        edit_at, id, direction = decode_cursor(cursor)
+        if direction == NEXT:
+            query = query.where(key < tuple_(edit_at, id)).order_by(Post.edit_at.desc(), Post.id.desc())
+        else:
+            query = query.where(key > tuple_(edit_at, id)).order_by(Post.edit_at, Post.id)
+
+    result = await session.execute(query.limit(limit+1))
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if direction == PREV:
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    first, last = _post(rows[0]), _post(rows[-1])
+    has_next = has_more if direction == NEXT else True
+    has_prev = has_more if direction == PREV else (cursor is not None or page > 1)
+
+    next_cursor = encode_cursor(last.edit_at, last.id, NEXT) if has_next else None
+    prev_cursor = encode_cursor(first.edit_at, first.id, PREV) if has_prev else None
+
+    return rows, next_cursor, prev_cursor
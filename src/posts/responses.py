@@ -0,0 +1,16 @@
+import orjson
+from fastapi.responses import Response
+
+
+def dumps(content) -> bytes:
+    """orjson encoding of database rows; asyncpg returns its own uuid.UUID subclass, which orjson only takes through ``default``."""
+    return orjson.dumps(content, default=str)
+
+
+class RowJSONResponse(Response):
+    """JSON response for rows that are already plain columns, encoded with ``dumps`` without a response_model pass."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
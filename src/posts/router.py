@@ -1,30 +1,79 @@
-import json
 import math
+import uuid
 from datetime import datetime
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Form
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, Form, Path, Query
+from fastapi.responses import RedirectResponse, StreamingResponse
 import starlette.status as status
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import insert, select, update, delete
+from sqlalchemy import insert, select, update, delete, literal, exists, UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.functions import count
 from sqlalchemy.sql.operators import and_, or_
 
 from src.auth.models import User
-from src.database import get_async_session
-from src.posts.models import Post, Like
+from src.database import get_async_session, get_read_session
+from src.posts.models import Post, Like, Counter, POST_COLUMNS
+from src.posts.pagination import fetch_page
+from src.posts.cache import feed_cache
+from src.posts.search import search_posts
+from src.posts.bulk import iter_ndjson, import_posts, export_rows, MAX_BATCH_SIZE, EXPORTS, EXPORT_FORMATS
+from src.posts.counters import POSTS, FEED, increment, post_count, feed_version
+from src.posts.conditional import make_etag, not_modified, validator_headers
+from src.posts.responses import RowJSONResponse
 from src.app import current_active_user
-from src.posts.schemas import PostCreate, PostUpdate
-
-templates = Jinja2Templates(directory="src/templates")
+from src.ratelimit import like_limit, post_limit
+from src.posts.schemas import PostCreate, PostUpdate, FeedPage, SearchPage
+from src.templating import templates, stream_template
+from src.config import TEMPLATE_STREAMING
 
 router = APIRouter(
     tags=["Posts"],
     prefix="/posts"
 )
 
-@router.post("/addpost")
+async def liked_post_ids(session: AsyncSession, user_id, post_ids: list[int]) -> set[int]:
+    if not post_ids:
+        return set()
+
+    query = select(Like.post_id).where(Like.user_id==user_id, Like.post_id.in_(post_ids))
+    result = await session.execute(query)
+
+    return set(result.scalars().all())
+
+async def like_state(session: AsyncSession, user_id, post_ids: list[int]) -> dict[int, dict]:
+    """Current like count, liked-by-user flag and last like time for the posts of a (possibly cached) page."""
+    if not post_ids:
+        return {}
+
+    liked = select(Like.id).where(Like.post_id==Post.id, Like.user_id==user_id).exists()
+    query = select(Post.id, Post.like_count, Post.liked_at, liked.label("liked")).where(Post.id.in_(post_ids))
+    result = await session.execute(query)
+
+    return {row.id: {"count": row.like_count, "liked": row.liked, "liked_at": row.liked_at} for row in result}
+
+async def api_page(session: AsyncSession, query, user_id, limit: int, page: int, cursor: Optional[str]) -> dict:
+    rows, next_cursor, prev_cursor = await fetch_page(session, query, limit, page, cursor)
+    likes = await liked_post_ids(session, user_id, [row.id for row in rows])
+
+    return {
+        "posts": [{**row._mapping, "liked": row.id in likes} for row in rows],
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
+
+async def raise_not_owned(session: AsyncSession, id: int):
+    """Called after a conditional write matched no row: 403 if the post exists, 404 otherwise."""
+    post_id = await session.scalar(select(Post.id).where(Post.id == id))
+
+    raise HTTPException(status_code=403 if post_id else 404, detail={
+        "status": "not success",
+        "detail": None,
+        "data": None
+    })
+
+@router.post("/addpost", dependencies=[Depends(post_limit)])
 async def add_post(
         user: User = Depends(current_active_user), session: AsyncSession = Depends(get_async_session),
         head: str = Form(...), description: str = Form(...), post: PostCreate = None
@@ -33,6 +82,7 @@ async def add_post(
         data = {"head": head, "description": description, "user_id": user.id}
         stmt = insert(Post).values(**data)
         await session.execute(stmt)
+        await session.execute(increment({POSTS: 1, FEED: 1}))
         await session.commit()
 
         # return {
@@ -49,33 +99,120 @@ async def add_post(
             "data": None,
         })
 
+@router.post("/import")
+async def bulk_import(
+        request: Request, batch_size: int = Query(1000, ge=1, le=MAX_BATCH_SIZE),
+        session: AsyncSession = Depends(get_async_session), user: User = Depends(current_active_user)
+):
+    """Bulk insert posts from an NDJSON request body (one {"head", "description"} object per line)."""
+    # one request can insert millions of rows, so like export it is an operator tool outside post_limit
+    if not user.is_superuser:
+        raise HTTPException(status_code=403)
+
+    return await import_posts(session, iter_ndjson(request.stream()), user.id, batch_size)
+
+@router.get("/export/{table}")
+async def export(
+        table: str, format: str = "ndjson", gzip: bool = False, user: User = Depends(current_active_user)
+):
+    if not user.is_superuser:
+        raise HTTPException(status_code=403)
+    if table not in EXPORTS or format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=404)
+
+    filename = f"{table}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_rows(table, format, gzip),
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @router.get("/form-addpost")
 async def form_post(request: Request):
-    return templates.TemplateResponse("add-post.html", {"request":request, "title":"Добавить статью"})
+    return templates.TemplateResponse(request, "add-post.html", {"request":request, "title":"Добавить статью"})
 
 @router.get("/feed-posts/{page}")
 async def posts(
-        request: Request, session: AsyncSession = Depends(get_async_session), limit: int = 10, page: int = 1,
-        user: User = Depends(current_active_user)
+        request: Request, session: AsyncSession = Depends(get_read_session), limit: int = Query(10, ge=1, le=100),
+        page: int = Path(ge=1), cursor: Optional[str] = None, user: User = Depends(current_active_user)
 ):
-    query = select(Post).order_by(Post.edit_at)
-    result = await session.execute(query)
-
-    offset = (page-1)*10
-    posts = result.all()[::-1][offset:][:limit]
-
-    pages = await session.execute(query)
-    pages = json.dumps(math.ceil(len(pages.scalars().all())/10))
+    version, modified = await feed_version(session)
+
+    # keyed by the version read above, so a post write from any worker makes the cached page miss
+    key, feed = await feed_cache.get(version, page, cursor, limit) if version is not None else (None, None)
+    if feed is None:
+        posts, next_cursor, prev_cursor = await fetch_page(session, select(Post), limit, page, cursor)
+        fragment = templates.get_template("post.html")
+
+        feed = {
+            "posts": [{"id": post.id, "user_id": str(post.user_id), "html": fragment.render(post=post)} for post, in posts],
+            "pages": math.ceil(await post_count(session)/limit),
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+        if key is not None:
+            await feed_cache.set(key, feed)
+
+    likes = await like_state(session, user.id, [post["id"] for post in feed["posts"]])
+
+    headers = None
+    if version is not None:
+        # likes do not bump the feed version, so the page's like state goes into the validators
+        etag = make_etag("html", version, user.id, page, cursor, limit,
+                         sorted((id, like["count"], like["liked"]) for id, like in likes.items()))
+        modified = max([modified, *(like["liked_at"] for like in likes.values() if like["liked_at"])])
+        response = not_modified(request, etag, modified)
+        if response is not None:
+            return response
+
+        headers = validator_headers(etag, modified)
+
+    context = {"request":request, **feed, "page": page, "user": str(user.id), "likes": likes}
+
+    if TEMPLATE_STREAMING:
+        return stream_template("feed.html", context, headers)
+
+    return templates.TemplateResponse(request, "feed.html", context, headers=headers)
+
+@router.get("/api/feed", response_model=FeedPage, response_class=RowJSONResponse)
+async def api_feed(
+        request: Request, session: AsyncSession = Depends(get_read_session), limit: int = Query(10, ge=1, le=100),
+        page: int = Query(1, ge=1), cursor: Optional[str] = None, user: User = Depends(current_active_user)
+):
+    feed = await api_page(session, select(*POST_COLUMNS), user.id, limit, page, cursor)
+
+    # likes are not timestamped on the page rows, so the JSON feed is validated by ETag alone
+    etag = make_etag("api", user.id, [tuple(post.values()) for post in feed["posts"]],
+                     feed["next_cursor"], feed["prev_cursor"])
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    # rows are already plain columns, so skip the response_model round trip and let orjson encode them
+    return RowJSONResponse(feed, headers=validator_headers(etag))
+
+@router.get("/user/{user_id}", response_model=FeedPage, response_class=RowJSONResponse)
+async def user_posts(
+        user_id: uuid.UUID, session: AsyncSession = Depends(get_read_session), limit: int = Query(10, ge=1, le=100),
+        page: int = Query(1, ge=1), cursor: Optional[str] = None, user: User = Depends(current_active_user)
+):
+    query = select(*POST_COLUMNS).where(Post.user_id == user_id)
 
-    query = select(Like.post_id).where(Like.user_id==user.id)
-    likes = await session.execute(query)
+    return RowJSONResponse(await api_page(session, query, user.id, limit, page, cursor))
 
-    context = {
-        "request":request, "posts":posts, "pages":pages, "user": user.id, "likes": likes.scalars().all()
-    }
+@router.get("/search", response_model=SearchPage, response_class=RowJSONResponse)
+async def search(
+        q: str = Query(..., min_length=1, max_length=255), session: AsyncSession = Depends(get_read_session),
+        limit: int = Query(10, ge=1, le=100), cursor: Optional[str] = None, user: User = Depends(current_active_user)
+):
+    posts, next_cursor = await search_posts(session, q, limit, cursor)
 
+    likes = await liked_post_ids(session, user.id, [post["id"] for post in posts])
 
-    return templates.TemplateResponse("feed.html", context)
+    return RowJSONResponse({
+        "posts": [{**post, "liked": post["id"] in likes} for post in posts],
+        "next_cursor": next_cursor,
+    })
 
 @router.post("/edit-post/{id}")
 async def edit_post(
@@ -83,15 +220,15 @@ async def edit_post(
         user: User = Depends(current_active_user), post: PostUpdate = None
                     ):
     try:
-        query = select(Post).where(Post.id == id)
-        result = await session.execute(query)
+        data = {"head": head, "description": description, "user_id": user.id, "edit_at": datetime.utcnow()}
+        edited = update(Post).values(**data).where(Post.id==id, Post.user_id==user.id).returning(Post.id).cte("edited")
+        touched = increment({FEED: 1}).where(exists(select(edited.c.id))).returning(Counter.value).cte("touched")
+        result = await session.execute(select(edited.c.id).add_cte(touched))
 
-        if not (result.scalars().all()[0].user_id == user.id):
-            raise Exception
+        if result.first() is None:
+            await session.rollback()
+            await raise_not_owned(session, id)
 
-        data = {"head": head, "description": description, "user_id": user.id, "edit_at": datetime.utcnow()}
-        stmt = update(Post).values(**data).where(Post.id==id)
-        await session.execute(stmt)
         await session.commit()
 
         # return {
@@ -102,6 +239,8 @@ async def edit_post(
 
         return RedirectResponse("/posts/feed-posts/1", status_code=status.HTTP_302_FOUND)
 
+    except HTTPException:
+        raise
     except Exception:
         return HTTPException(status_code=500, detail={
             "status": "not success",
@@ -112,7 +251,7 @@ async def edit_post(
 @router.get("/edit-form/{id}")
 async def edit_form(
         id: int, request: Request, user: User = Depends(current_active_user),
-        session: AsyncSession = Depends(get_async_session)
+        session: AsyncSession = Depends(get_read_session)
                     ):
 
     query = select(Post).where(Post.id == id)
@@ -120,21 +259,25 @@ async def edit_form(
 
     context = {"request":request, "id":id, "user_id":user.id, "author":result.scalars().all()[0].user_id}
 
-    return templates.TemplateResponse("edit-post.html", context)
+    return templates.TemplateResponse(request, "edit-post.html", context)
 
 @router.get("/delete/{id}")
 async def delete_post(
         id: int, session: AsyncSession = Depends(get_async_session), user: User = Depends(current_active_user)
 ):
     try:
-        query = select(Post).where(Post.id == id)
-        result = await session.execute(query)
-
-        if user.id != result.scalars().all()[0].user_id:
-            raise Exception
+        deleted = delete(Post).where(Post.id==id, Post.user_id==user.id).returning(Post.id).cte("deleted")
+        likes = delete(Like).where(Like.post_id.in_(select(deleted.c.id))).returning(Like.id).cte("likes")
+        counted = (
+            increment({POSTS: -1, FEED: 1}).where(exists(select(deleted.c.id)))
+            .returning(Counter.value).cte("counted")
+        )
+        result = await session.execute(select(deleted.c.id).add_cte(likes, counted))
+
+        if result.first() is None:
+            await session.rollback()
+            await raise_not_owned(session, id)
 
-        stmt = delete(Post).where(Post.id==id)
-        await session.execute(stmt)
         await session.commit()
 
         # return {
@@ -145,6 +288,8 @@ async def delete_post(
 
         return RedirectResponse("/posts/feed-posts/1", status_code=status.HTTP_302_FOUND)
 
+    except HTTPException:
+        raise
     except Exception:
         return HTTPException(status_code=500, detail={
             "status": "not success",
@@ -152,27 +297,26 @@ async def delete_post(
             "data": None
         })
 
-@router.get("/addlike/{id}")
+@router.get("/addlike/{id}", dependencies=[Depends(like_limit)])
 async def like_post(
         id: int, session: AsyncSession = Depends(get_async_session), user: User = Depends(current_active_user)
 ):
     try:
 
-        query = select(Post).where(Post.id==id)
-        result = await session.execute(query)
-
-        if result.scalars().all()[0].user_id == user.id:
-            raise Exception
-
-        query = select(Like).where(and_(Like.user_id==user.id, Like.post_id==id))
-        result = await session.execute(query)
-
-        data = {"user_id": user.id, "post_id": id}
-
-        if result.all() == []:
-            stmt = insert(Like).values(**data)
-            await session.execute(stmt)
-            await session.commit()
+        author = select(literal(user.id, UUID), Post.id).where(Post.id == id, Post.user_id != user.id)
+        liked = (
+            pg_insert(Like).from_select(["user_id", "post_id"], author)
+            .on_conflict_do_nothing(index_elements=["user_id", "post_id"])
+            .returning(Like.post_id)
+            .cte("liked")
+        )
+        stmt = (
+            update(Post).where(Post.id.in_(select(liked.c.post_id)))
+            .values(like_count=Post.like_count + 1, liked_at=datetime.utcnow())
+            .add_cte(liked)
+        )
+        await session.execute(stmt)
+        await session.commit()
 
         # return {
         #     "status": "success",
@@ -189,13 +333,22 @@ async def like_post(
             "data": None
         })
 
-@router.get("/deletelike/{id}")
+@router.get("/deletelike/{id}", dependencies=[Depends(like_limit)])
 async def like_post(
         id: int, session: AsyncSession = Depends(get_async_session), user: User = Depends(current_active_user)
 ):
     try:
 
-        stmt = delete(Like).where(and_(user.id == Like.user_id, Like.post_id == id))
+        unliked = (
+            delete(Like).where(and_(user.id == Like.user_id, Like.post_id == id))
+            .returning(Like.post_id)
+            .cte("unliked")
+        )
+        stmt = (
+            update(Post).where(Post.id.in_(select(unliked.c.post_id)))
+            .values(like_count=Post.like_count - 1, liked_at=datetime.utcnow())
+            .add_cte(unliked)
+        )
         await session.execute(stmt)
         await session.commit()
 
@@ -1,3 +1,7 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
 from pydantic import BaseModel
 
 class PostCreate(BaseModel):
@@ -5,4 +9,24 @@ class PostCreate(BaseModel):
     description: str
 
 class PostUpdate(PostCreate):
-    pass
\ No newline at end of file
+    pass
+
+class PostRead(PostCreate):
+    id: int
+    created_at: Optional[datetime]
+    edit_at: Optional[datetime]
+    user_id: uuid.UUID
+    like_count: int
+    liked: bool
+
+class FeedPage(BaseModel):
+    posts: List[PostRead]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+class SearchHit(PostRead):
+    rank: float
+
+class SearchPage(BaseModel):
+    posts: List[SearchHit]
+    next_cursor: Optional[str]
\ No newline at end of file
@@ -0,0 +1,112 @@
+import base64
+import json
+import re
+from collections import Counter, defaultdict
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.posts.counters import feed_version
+from src.posts.models import Post, POST_COLUMNS
+
+SEARCH_CONFIG = "simple"
+
+
+def encode_search_cursor(rank: float, id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([rank, id]).encode()).decode()
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        rank, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail={
+            "status": "not success",
+            "detail": "invalid cursor",
+            "data": None,
+        })
+
+
+def tokenize(text: str) -> list[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+class InvertedIndex:
+    """In-process stand-in for the tsvector index on databases without Postgres full-text search.
+
+    Rebuilt from the post table whenever the feed version changes; meant for tests and local runs.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._postings = defaultdict(dict)
+
+    def build(self, rows, version: Optional[int]) -> None:
+        """Index (id, head, description) rows."""
+        postings = defaultdict(dict)
+        for id, head, description in rows:
+            for term, frequency in Counter(tokenize(f"{head} {description}")).items():
+                postings[term][id] = frequency
+
+        self._postings, self.version = postings, version
+
+    def search(self, q: str) -> list[tuple[float, int]]:
+        """(rank, id) of posts containing every term, best first."""
+        matches = [self._postings.get(term, {}) for term in tokenize(q)]
+        if not matches:
+            return []
+
+        ids = set.intersection(*(set(match) for match in matches))
+        return sorted(((float(sum(match[id] for match in matches)), id) for id in ids), reverse=True)
+
+
+_index = InvertedIndex()
+
+
+async def search_posts(
+        session: AsyncSession, q: str, limit: int = 10, cursor: Optional[str] = None
+) -> tuple[list[dict], Optional[str]]:
+    """Posts matching ``q`` ordered by (rank DESC, id DESC), with a keyset cursor for the next page."""
+    after = decode_search_cursor(cursor) if cursor is not None else None
+
+    if session.get_bind().dialect.name != "postgresql":
+        return await _search_in_process(session, q, limit, after)
+
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank(Post.search, tsquery)
+
+    query = select(*POST_COLUMNS, rank.label("rank")).where(Post.search.op("@@")(tsquery))
+    if after is not None:
+        query = query.where(tuple_(rank, Post.id) < tuple_(*after))
+
+    result = await session.execute(query.order_by(rank.desc(), Post.id.desc()).limit(limit+1))
+    rows = result.all()
+    posts = [dict(row._mapping) for row in rows[:limit]]
+
+    next_cursor = encode_search_cursor(posts[-1]["rank"], posts[-1]["id"]) if len(rows) > limit else None
+    return posts, next_cursor
+
+
+async def _search_in_process(
+        session: AsyncSession, q: str, limit: int, after: Optional[tuple[float, int]]
+) -> tuple[list[dict], Optional[str]]:
+    version, _ = await feed_version(session)
+    if version is None or version != _index.version:
+        result = await session.execute(select(Post.id, Post.head, Post.description))
+        _index.build(result.all(), version)
+
+    hits = _index.search(q)
+    if after is not None:
+        hits = [hit for hit in hits if hit < after]
+
+    # the index only holds terms; the page itself is read fresh so like counts are current
+    page = hits[:limit]
+    result = await session.execute(select(*POST_COLUMNS).where(Post.id.in_([id for _, id in page])))
+    rows = {row.id: dict(row._mapping) for row in result}
+    posts = [{**rows[id], "rank": rank} for rank, id in page if id in rows]
+
+    next_cursor = encode_search_cursor(*page[-1]) if len(hits) > limit else None
+    return posts, next_cursor
@@ -0,0 +1,169 @@
+import ipaddress
+import itertools
+import math
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request
+import starlette.status as status
+
+from src.app import current_active_user
+from src.auth.models import User
+from src.cache import redis_client
+from src.config import RATE_LIMIT_BACKEND, RATE_LIMIT_IP_FACTOR, LIKE_RATE, LIKE_BURST, POST_RATE, POST_BURST, \
+    TRUSTED_PROXIES
+
+
+class MemoryBuckets:
+    """Token buckets kept in process memory, swept back under ``max_keys`` whenever that is exceeded."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> (tokens, updated, full_at); a bucket past full_at is the same as a missing one
+        self._buckets = {}
+
+    async def acquire(self, limits: list[tuple[str, float, int]]) -> float:
+        """Take one token from each (key, rate, burst) bucket, or none if any is empty.
+
+        Return 0 on success or the seconds until every bucket has a token again.
+        """
+        now = time.monotonic()
+        levels = []
+        for key, rate, burst in limits:
+            # popped and set again below, which keeps the dict in least recently used order
+            tokens, updated, _ = self._buckets.pop(key, (burst, now, now))
+            levels.append(min(burst, tokens + (now - updated) * rate))
+
+        retry = max([(1 - tokens) / rate for tokens, (_, rate, _) in zip(levels, limits) if tokens < 1], default=0)
+        spent = 0 if retry else 1
+        for (key, rate, burst), tokens in zip(limits, levels):
+            tokens -= spent
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+
+        if len(self._buckets) > self.max_keys:
+            self._sweep(now)
+        return retry
+
+    def _sweep(self, now: float) -> None:
+        """Drop refilled buckets, then the least recently used ones until a quarter of ``max_keys`` is free.
+
+        The headroom keeps sweeps to one per ``max_keys / 4`` new keys even when every
+        bucket is still draining.
+        """
+        live = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        excess = len(live) - (self.max_keys - self.max_keys // 4)
+        if excess > 0:
+            live = dict(itertools.islice(live.items(), excess, None))
+        self._buckets = live
+
+
+class RedisBuckets:
+    """Token buckets shared by all workers, updated atomically by a Lua script using the server clock."""
+
+    SCRIPT = """
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local levels = {}
+    local retry = 0
+    for i, key in ipairs(KEYS) do
+        local rate = tonumber(ARGV[2 * i - 1])
+        local burst = tonumber(ARGV[2 * i])
+        local bucket = redis.call('HMGET', key, 'tokens', 'updated')
+        local tokens = tonumber(bucket[1]) or burst
+        local updated = tonumber(bucket[2]) or now
+        levels[i] = math.min(burst, tokens + (now - updated) * rate)
+        if levels[i] < 1 then
+            retry = math.max(retry, (1 - levels[i]) / rate)
+        end
+    end
+    local spent = 1
+    if retry > 0 then
+        spent = 0
+    end
+    for i, key in ipairs(KEYS) do
+        local rate = tonumber(ARGV[2 * i - 1])
+        local burst = tonumber(ARGV[2 * i])
+        local tokens = levels[i] - spent
+        redis.call('HSET', key, 'tokens', tokens, 'updated', now)
+        redis.call('EXPIRE', key, math.max(1, math.ceil((burst - tokens) / rate)))
+    end
+    return tostring(retry)
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit"):
+        self.prefix = prefix
+        self._script = client.register_script(self.SCRIPT)
+
+    async def acquire(self, limits: list[tuple[str, float, int]]) -> float:
+        keys = [f"{self.prefix}:{key}" for key, _, _ in limits]
+        args = [value for _, rate, burst in limits for value in (rate, burst)]
+        return float(await self._script(keys=keys, args=args))
+
+
+buckets = RedisBuckets(redis_client()) if RATE_LIMIT_BACKEND == "redis" else MemoryBuckets()
+
+_trusted_proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in TRUSTED_PROXIES]
+
+
+def _is_trusted(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+
+    return any(address in network for network in _trusted_proxies)
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """Address of the client, looking through X-Forwarded-For only when the peer is a trusted proxy.
+
+    The header is read from the right: each hop is appended by the proxy in front of
+    it, so the first address not belonging to TRUSTED_PROXIES is the one the client
+    connected from. Anything to the left of it is client-supplied and ignored.
+    """
+    if request.client is None:
+        return None
+
+    host = request.client.host
+    if not _is_trusted(host):
+        return host
+
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop):
+            return hop
+
+    return hops[0] if hops else host
+
+
+class RateLimit:
+    """Dependency throttling a group of endpoints per user and, more loosely, per client IP.
+
+    Both buckets are checked together, so a request rejected by one does not spend a token from the other.
+    """
+
+    def __init__(self, scope: str, rate: float, burst: int):
+        self.scope = scope
+        self.rate = rate
+        self.burst = burst
+
+    async def __call__(self, request: Request, user: User = Depends(current_active_user)) -> None:
+        limits = [(f"{self.scope}:user:{user.id}", self.rate, self.burst)]
+
+        ip = client_ip(request)
+        if ip is not None:
+            limits.append(
+                (f"{self.scope}:ip:{ip}", self.rate * RATE_LIMIT_IP_FACTOR, int(self.burst * RATE_LIMIT_IP_FACTOR))
+            )
+
+        retry_after = await buckets.acquire(limits)
+
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+like_limit = RateLimit("like", LIKE_RATE, LIKE_BURST)
+post_limit = RateLimit("post", POST_RATE, POST_BURST)
@@ -0,0 +1,31 @@
+from typing import Iterable, Iterator, Optional
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
+from starlette.responses import StreamingResponse
+
+from src.config import DEBUG, TEMPLATE_CACHE_DIR
+
+templates = Jinja2Templates(directory="src/templates")
+templates.env.bytecode_cache = FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+templates.env.auto_reload = DEBUG
+
+
+def _buffered(events: Iterable[str], size: int = 8192) -> Iterator[str]:
+    # Jinja yields many tiny strings; group them so each chunk costs one threadpool hop, not hundreds.
+    buffer, length = [], 0
+    for event in events:
+        buffer.append(event)
+        length += len(event)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_template(name: str, context: dict, headers: Optional[dict] = None) -> StreamingResponse:
+    """Like templates.TemplateResponse, but sends the page while it is still being rendered."""
+    template = templates.get_template(name)
+    return StreamingResponse(_buffered(template.generate(context)), headers=headers, media_type="text/html")
@@ -0,0 +1,151 @@
+import os
+import time
+import uuid
+
+import httpx
+import pytest
+from fastapi import Request
+
+for key, value in {
+    "DB_HOST": "localhost", "DB_PORT": "5432", "DB_NAME": "test", "DB_USER": "test", "DB_PASS": "test",
+    "SECRET": "test-secret-long-enough-for-hs256", "REDIS_HOST": "localhost", "REDIS_PORT": "6379",
+}.items():
+    os.environ.setdefault(key, value)
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.auth.models import User
+from src.database import Base
+from src.metrics import instrument_engine
+from src.posts.counters import FEED, POSTS
+from src.posts.models import Counter
+
+# Postgres-only behaviour (tsvector search, ON CONFLICT races, EXPLAIN plans) is
+# tested against this database when set; those tests are skipped otherwise
+POSTGRES_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis.asyncio commands the cache backends use."""
+
+    def __init__(self):
+        self.data = {}
+
+    def _live(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    async def get(self, key):
+        value = self._live(key)
+        return None if value is None else str(value).encode()
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = (value, time.monotonic() + ex if ex else None)
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def ttl(self, key) -> float:
+        return self.data[key][1] - time.monotonic()
+
+
+async def create_schema(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with maker() as session:
+        session.add_all([Counter(name=POSTS, value=0), Counter(name=FEED, value=0)])
+        await session.commit()
+
+
+@pytest.fixture
+async def sqlite_engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    # instrumented like the app's engines, so query_budget sees the statements of requests in tests
+    instrument_engine(engine)
+    await create_schema(engine)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def postgres_engine():
+    if not POSTGRES_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    engine = create_async_engine(POSTGRES_URL, pool_size=20)
+    instrument_engine(engine)
+    await create_schema(engine)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def engine(request):
+    return request.getfixturevalue(f"{request.param}_engine")
+
+
+@pytest.fixture
+def session_maker(engine):
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def make_user(session_maker, name: str = None) -> User:
+    name = name or uuid.uuid4().hex[:8]
+    user = User(
+        id=uuid.uuid4(), email=f"{name}@example.com", username=name, hashed_password="x",
+        is_active=True, is_superuser=False, is_verified=True,
+    )
+    async with session_maker() as session:
+        session.add(user)
+        await session.commit()
+
+    return user
+
+
+@pytest.fixture
+def app(session_maker):
+    from src.app import current_active_user
+    from src.database import get_async_session, get_read_session
+    from src.main import app
+    from src.ratelimit import like_limit, post_limit
+
+    async def session():
+        async with session_maker() as session:
+            yield session
+
+    users = {}
+
+    async def current_user(request: Request):
+        return users[request.headers["x-test-user"]]
+
+    app.dependency_overrides.update({
+        get_async_session: session,
+        get_read_session: session,
+        current_active_user: current_user,
+        like_limit: lambda: None,
+        post_limit: lambda: None,
+    })
+    app.state.test_users = users
+    yield app
+    app.dependency_overrides.clear()
+
+
+def client_for(app, user: User | None) -> httpx.AsyncClient:
+    """Client whose requests are authenticated as ``user``, or anonymous when it is None."""
+    headers = {}
+    if user is not None:
+        app.state.test_users[str(user.id)] = user
+        headers["x-test-user"] = str(user.id)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", headers=headers)
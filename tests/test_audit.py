@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import create_engine, insert, select, text
+
+from src.audit import audit_queries, normalize, query_budget
+from src.metrics import instrument_engine
+from src.posts.models import Post
+
+from conftest import client_for, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("statement, expected", [
+    ("SELECT * FROM post WHERE id = 42 AND head = 'it''s'", "SELECT * FROM post WHERE id = ? AND head = ?"),
+    ("SELECT * FROM post WHERE id = $1 AND user_id = $2", "SELECT * FROM post WHERE id = ? AND user_id = ?"),
+    ("SELECT * FROM post WHERE id = %(id_1)s", "SELECT * FROM post WHERE id = ?"),
+    ("SELECT * FROM post WHERE id = :id AND edit_at::date = 3", "SELECT * FROM post WHERE id = ? AND edit_at::date = ?"),
+    ("SELECT * FROM post WHERE id IN (?, ?, ?)", "SELECT * FROM post WHERE id IN (...)"),
+    ("SELECT * FROM post WHERE id IN ($1, $2)", "SELECT * FROM post WHERE id IN (...)"),
+    ("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)", "INSERT INTO t (a, b) VALUES (...)"),
+    ("SELECT 1\n  FROM   post", "SELECT ? FROM post"),
+])
+def test_normalize_groups_equivalent_statements(statement, expected):
+    assert normalize(statement) == expected
+
+
+def test_instrumenting_twice_records_once():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    instrument_engine(engine)
+
+    with audit_queries() as audit, engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    assert audit.count == 1
+
+
+async def make_posts(session_maker, count: int) -> list[int]:
+    author = await make_user(session_maker)
+    async with session_maker() as session:
+        ids = (await session.scalars(insert(Post).returning(Post.id), [
+            {"head": f"post {i}", "description": "text", "user_id": author.id} for i in range(count)
+        ])).all()
+        await session.commit()
+
+    return list(ids)
+
+
+async def test_over_budget_route_fails(app, session_maker):
+    await make_posts(session_maker, 3)
+    reader = await make_user(session_maker)
+
+    async with client_for(app, reader) as client:
+        with pytest.raises(AssertionError, match="query budget of 1 exceeded"):
+            with query_budget(1):
+                await client.get("/posts/api/feed")
+
+        # the page itself and the liked-by-me lookup
+        with query_budget(2) as audit:
+            await client.get("/posts/api/feed")
+
+    assert audit.count == 2
+
+
+async def test_repeated_statement_fails_the_budget(session_maker):
+    ids = await make_posts(session_maker, 5)
+
+    async with session_maker() as session:
+        with pytest.raises(AssertionError, match="repeated more than 1 times"):
+            with query_budget(100, max_repeats=1):
+                # one SELECT per post instead of one for all of them
+                for id in ids:
+                    await session.scalar(select(Post.head).where(Post.id == id))
+
+        with query_budget(100, max_repeats=1):
+            await session.scalars(select(Post.head).where(Post.id.in_(ids)))
@@ -0,0 +1,220 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi_users import exceptions
+from fastapi_users.jwt import decode_jwt, generate_jwt
+from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+from fastapi_users_db_sqlalchemy.access_token import SQLAlchemyAccessTokenDatabase
+from sqlalchemy import func, insert, select
+
+from src.audit import audit_queries
+from src.auth import base_config
+from src.auth.base_config import CachedDatabaseStrategy, ClaimsJWTStrategy, invalidate_user, user_cache
+from src.auth.commands import delete_expired_tokens
+from src.auth.manager import UserManager
+from src.auth.models import AccessToken, User
+from src.auth.schemas import UserUpdate
+from src.cache import MemoryBackend
+
+import conftest
+
+pytestmark = pytest.mark.anyio
+
+SECRET = "claims-test-secret-long-enough-for-hs256"
+
+
+class FakeUserManager:
+    """Stands in for UserManager: counts row loads and returns whatever ``rows`` holds."""
+
+    def __init__(self, *users):
+        self.rows = {user.id: user for user in users}
+        self.loads = 0
+
+    def parse_id(self, value):
+        return uuid.UUID(str(value))
+
+    async def get(self, id):
+        self.loads += 1
+        if id not in self.rows:
+            raise exceptions.UserNotExists()
+        return self.rows[id]
+
+
+@pytest.fixture
+def strategy(monkeypatch):
+    monkeypatch.setattr(base_config, "JWT_USER_CLAIMS", True)
+    user_cache.clear()
+    yield ClaimsJWTStrategy(secret=SECRET, lifetime_seconds=3600)
+    user_cache.clear()
+
+
+def make_user(**fields) -> User:
+    return User(**{
+        "id": uuid.uuid4(), "email": "a@example.com", "username": "a", "hashed_password": "x",
+        "is_active": True, "is_superuser": False, "is_verified": True, **fields,
+    })
+
+
+def token_issued(strategy, user: User, seconds_ago: float) -> str:
+    data = {"sub": str(user.id), "aud": strategy.token_audience, "iat": int(time.time() - seconds_ago)}
+    data.update({claim: getattr(user, claim) for claim in strategy.CLAIMS})
+    return generate_jwt(data, strategy.encode_key, strategy.lifetime_seconds, algorithm=strategy.algorithm)
+
+
+async def test_plain_tokens_carry_no_claims(monkeypatch):
+    monkeypatch.setattr(base_config, "JWT_USER_CLAIMS", False)
+    strategy = ClaimsJWTStrategy(secret=SECRET, lifetime_seconds=3600)
+
+    data = decode_jwt(await strategy.write_token(make_user()), SECRET, strategy.token_audience)
+
+    assert not set(strategy.CLAIMS) & set(data)
+
+
+async def test_fresh_claims_skip_the_user_row(strategy):
+    user = make_user()
+    manager = FakeUserManager(user)
+
+    resolved = await strategy.read_claims_user(await strategy.write_token(user), manager)
+
+    assert resolved.id == user.id and resolved.username == user.username
+    assert manager.loads == 0
+
+
+async def test_old_claims_are_checked_against_the_user_row(strategy, monkeypatch):
+    monkeypatch.setattr(base_config, "JWT_CLAIMS_MAX_AGE", 300)
+    user = make_user()
+    # deactivated by another worker, so this process never saw invalidate_user
+    manager = FakeUserManager(make_user(id=user.id, is_active=False))
+
+    resolved = await strategy.read_claims_user(token_issued(strategy, user, seconds_ago=301), manager)
+
+    assert manager.loads == 1
+    assert resolved.is_active is False
+
+
+async def test_update_in_this_process_distrusts_earlier_tokens(strategy):
+    user = make_user()
+    token = token_issued(strategy, user, seconds_ago=5)
+    manager = FakeUserManager(make_user(id=user.id, is_active=False))
+
+    invalidate_user(user.id)
+    resolved = await strategy.read_claims_user(token, manager)
+
+    assert manager.loads == 1
+    assert resolved.is_active is False
+
+
+async def test_deleted_user_is_rejected(strategy):
+    user = make_user()
+
+    assert await strategy.read_claims_user(token_issued(strategy, user, seconds_ago=600), FakeUserManager()) is None
+
+
+@pytest.fixture
+def engine(sqlite_engine):
+    return sqlite_engine
+
+
+@pytest.fixture
+def tokens(monkeypatch):
+    monkeypatch.setattr(base_config, "token_cache", MemoryBackend())
+    user_cache.clear()
+    yield base_config.token_cache
+    user_cache.clear()
+
+
+def database_strategy(session) -> tuple[CachedDatabaseStrategy, UserManager]:
+    """What one request gets: the strategy and the user manager share its session."""
+    strategy = CachedDatabaseStrategy(SQLAlchemyAccessTokenDatabase(session, AccessToken), lifetime_seconds=3600)
+    return strategy, UserManager(SQLAlchemyUserDatabase(session, User))
+
+
+async def test_logout_revokes_the_token(session_maker, tokens):
+    user = await conftest.make_user(session_maker)
+    async with session_maker() as session:
+        strategy, manager = database_strategy(session)
+        token = await strategy.write_token(user)
+        assert (await strategy.read_token(token, manager)).id == user.id
+
+        await strategy.destroy_token(token, user)
+
+    async with session_maker() as session:
+        strategy, manager = database_strategy(session)
+        assert await strategy.read_token(token, manager) is None
+        assert await tokens.get(token) is None
+
+
+async def test_warm_lookup_issues_no_queries(session_maker, tokens):
+    user = await conftest.make_user(session_maker)
+    async with session_maker() as session:
+        token = await database_strategy(session)[0].write_token(user)
+
+    async with session_maker() as session:
+        strategy, manager = database_strategy(session)
+        with audit_queries() as cold:
+            await strategy.read_token(token, manager)
+
+    async with session_maker() as session:
+        strategy, manager = database_strategy(session)
+        with audit_queries() as warm:
+            resolved = await strategy.read_token(token, manager)
+
+    assert cold.count == 2  # the token row, then the user row
+    assert warm.count == 0
+    assert resolved.id == user.id and resolved.username == user.username
+
+
+async def test_expired_cache_entries_are_rejected(session_maker, tokens):
+    user = await conftest.make_user(session_maker)
+    async with session_maker() as session:
+        strategy, manager = database_strategy(session)
+        token = await strategy.write_token(user)
+        await strategy.read_token(token, manager)
+
+        # the row is still there, but the cached entry says the token ran out
+        await tokens.set(token, {**await tokens.get(token), "expires_at": time.time() - 1})
+
+        assert await strategy.read_token(token, manager) is None
+        assert await tokens.get(token) is None
+
+
+async def test_cached_users_are_not_shared_between_sessions(session_maker, tokens):
+    user = await conftest.make_user(session_maker)
+    async with session_maker() as session:
+        token = await database_strategy(session)[0].write_token(user)
+
+    # two requests at once: the first loads the user, the second is served from the cache
+    async with session_maker() as first, session_maker() as second:
+        strategy, manager = database_strategy(first)
+        loaded = await strategy.read_token(token, manager)
+
+        strategy, manager = database_strategy(second)
+        cached = await strategy.read_token(token, manager)
+        assert cached is not loaded and cached in second
+
+        updated = await manager.update(UserUpdate(username="renamed"), cached)
+
+    assert updated.username == "renamed"
+    async with session_maker() as session:
+        assert await session.scalar(select(User.username).where(User.id == user.id)) == "renamed"
+
+
+async def test_expired_tokens_are_deleted_in_batches(session_maker):
+    user = await conftest.make_user(session_maker)
+    now = datetime.now(timezone.utc)
+    async with session_maker() as session:
+        await session.execute(insert(AccessToken), [
+            {"token": f"old-{i}", "user_id": user.id, "created_at": now - timedelta(hours=2)} for i in range(25)
+        ] + [
+            {"token": f"new-{i}", "user_id": user.id, "created_at": now} for i in range(3)
+        ])
+        await session.commit()
+
+        with audit_queries() as audit:
+            deleted = await delete_expired_tokens(session, lifetime_seconds=3600, batch_size=10)
+
+        assert deleted == 25
+        assert sum(entry["count"] for sql, entry in audit.statements.items() if sql.startswith("DELETE")) == 3
+        assert await session.scalar(select(func.count()).select_from(AccessToken)) == 3
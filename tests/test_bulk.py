@@ -0,0 +1,159 @@
+import csv
+import gzip
+import io
+import json
+import uuid
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from src.posts.bulk import MAX_LINE_LENGTH, import_posts, iter_ndjson
+from src import database
+from src.posts.models import Like, Post
+
+from conftest import client_for, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def engine(postgres_engine):
+    # batches are INSERT ... ON CONFLICT DO NOTHING RETURNING built with the Postgres dialect
+    return postgres_engine
+
+
+def ndjson(*rows) -> bytes:
+    return b"\n".join(row if isinstance(row, bytes) else json.dumps(row).encode() for row in rows)
+
+
+async def lines(body: bytes):
+    for line_no, line in enumerate(body.split(b"\n"), 1):
+        yield line_no, line
+
+
+async def chunked(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(lines) -> list:
+    return [line async for line in lines]
+
+
+async def test_ndjson_lines_are_split_across_chunks():
+    lines = iter_ndjson(chunked(b'{"a": 1}\n{"b"', b': 2}\n\n', b'{"c": 3}'))
+
+    assert await collect(lines) == [(1, b'{"a": 1}'), (2, b'{"b": 2}'), (4, b'{"c": 3}')]
+
+
+async def test_overlong_ndjson_lines_are_skipped_to_the_next_newline():
+    lines = iter_ndjson(chunked(b"short\n", b"x" * 6, b"x" * 6, b"x\nafter\n", b"y" * 20), max_length=10)
+
+    assert await collect(lines) == [(1, b"short"), (2, None), (3, b"after"), (4, None)]
+
+
+async def test_import_needs_a_superuser(app, session_maker):
+    user = await make_user(session_maker)
+
+    async with client_for(app, user) as client:
+        response = await client.post("/posts/import", content=ndjson({"head": "fine", "description": "ok"}))
+
+    assert response.status_code == 403
+
+
+async def test_rows_the_database_would_reject_are_reported(app, session_maker):
+    user = await make_user(session_maker)
+    user.is_superuser = True
+    body = ndjson(
+        {"head": "fine", "description": "ok"},
+        {"head": "x" * 256, "description": "too long"},
+        {"head": "nul\x00head", "description": "ok"},
+        {"head": "nul description", "description": "a\x00b"},
+        b"{not json",
+        {"head": "fine", "description": "duplicate"},
+        {"head": "huge", "description": "x" * MAX_LINE_LENGTH},
+    )
+
+    async with client_for(app, user) as client:
+        response = await client.post("/posts/import", content=body)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["inserted"] == 1
+    assert [row["line"] for row in report["errors"]["lines"]] == [2, 3, 4, 5, 7]
+    assert report["conflicts"]["lines"] == [{"line": 6, "head": "fine"}]
+
+
+async def test_failed_batches_are_reported_and_the_import_goes_on(session_maker):
+    body = ndjson(*({"head": f"orphan {i}", "description": "text"} for i in range(5)))
+
+    async with session_maker() as session:
+        # no such user: every batch fails its foreign key check
+        report = await import_posts(session, lines(body), uuid.uuid4(), batch_size=2)
+
+    assert report["inserted"] == 0
+    assert report["errors"]["total"] == 5
+    assert [(row["line"], row["last_line"]) for row in report["errors"]["lines"]] == [(1, 2), (3, 4), (5, 5)]
+
+    async with session_maker() as session:
+        assert await session.scalar(select(func.count()).select_from(Post)) == 0
+
+
+@pytest.fixture
+async def exported(session_maker, monkeypatch):
+    """Two posts and a like; export_rows opens its own session, so it is pointed at the test database."""
+    monkeypatch.setattr(database, "async_session_maker", session_maker)
+    monkeypatch.setattr(database, "replica_session_makers", [])
+    author, reader = await make_user(session_maker), await make_user(session_maker)
+
+    async with session_maker() as session:
+        ids = (await session.scalars(insert(Post).returning(Post.id), [
+            {"head": "first", "description": "one", "user_id": author.id},
+            {"head": "second", "description": "two, with a comma", "user_id": author.id},
+        ])).all()
+        await session.execute(insert(Like).values(user_id=reader.id, post_id=ids[0]))
+        await session.commit()
+
+    reader.is_superuser = True
+    return reader, author, ids
+
+
+@pytest.mark.parametrize("compress", [False, True])
+async def test_export_ndjson_round_trips(app, exported, compress):
+    admin, author, ids = exported
+
+    async with client_for(app, admin) as client:
+        posts = await client.get("/posts/export/post", params={"gzip": compress})
+        likes = await client.get("/posts/export/like", params={"gzip": compress})
+
+    assert posts.status_code == likes.status_code == 200
+
+    def rows(response):
+        # httpx would undo a Content-Encoding, but the gzip here is the attachment itself
+        body = gzip.decompress(response.content) if compress else response.content
+        return [json.loads(line) for line in body.splitlines()]
+
+    assert [(row["id"], row["head"], row["user_id"]) for row in rows(posts)] == [
+        (ids[0], "first", str(author.id)), (ids[1], "second", str(author.id)),
+    ]
+    assert [(row["user_id"], row["post_id"]) for row in rows(likes)] == [(str(admin.id), ids[0])]
+
+
+async def test_export_csv_round_trips(app, exported):
+    admin, author, ids = exported
+
+    async with client_for(app, admin) as client:
+        response = await client.get("/posts/export/post", params={"format": "csv"})
+
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(int(row["id"]), row["description"], row["user_id"]) for row in rows] == [
+        (ids[0], "one", str(author.id)), (ids[1], "two, with a comma", str(author.id)),
+    ]
+
+
+async def test_export_needs_a_superuser(app, exported):
+    _, author, _ = exported
+
+    async with client_for(app, author) as client:
+        assert (await client.get("/posts/export/post")).status_code == 403
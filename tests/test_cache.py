@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import insert
+
+from src.cache import MemoryBackend, PageCache, RedisBackend, TTLCache
+from src.posts import router
+from src.posts.counters import POSTS, FEED, increment
+from src.posts.models import Post
+
+from conftest import FakeRedis, client_for, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(ttl=-1)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None and len(cache) == 0
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryBackend(maxsize=16, ttl=60)
+    return RedisBackend(FakeRedis(), "feed", ttl=60)
+
+
+async def test_page_cache_is_keyed_by_version(backend):
+    cache = PageCache(backend)
+    page = {"posts": [{"id": 1, "html": "<h3>1</h3>"}], "pages": 1}
+
+    key, value = await cache.get(7, 1, None, 10)
+    assert value is None
+    await cache.set(key, page)
+
+    assert (await cache.get(7, 1, None, 10))[1] == page
+    assert (await cache.get(8, 1, None, 10))[1] is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+async def test_redis_backend_sets_a_ttl():
+    client = FakeRedis()
+    backend = RedisBackend(client, "feed", ttl=30)
+    await backend.set("1:1", {"pages": 1})
+
+    assert 0 < client.ttl("feed:1:1") <= 30
+    assert await backend.get("1:1") == {"pages": 1}
+
+    await backend.delete("1:1")
+    assert await backend.get("1:1") is None
+
+
+async def test_feed_page_follows_writes_from_other_workers(app, session_maker, monkeypatch):
+    cache = PageCache(MemoryBackend())
+    monkeypatch.setattr(router, "feed_cache", cache)
+    reader, author = await make_user(session_maker), await make_user(session_maker)
+
+    async def write(head):
+        # what another worker's add_post commits; nothing touches this process's cache
+        async with session_maker() as session:
+            await session.execute(insert(Post).values(head=head, description="text", user_id=author.id))
+            await session.execute(increment({POSTS: 1, FEED: 1}))
+            await session.commit()
+
+    await write("first post")
+    async with client_for(app, reader) as client:
+        assert "first post" in (await client.get("/posts/feed-posts/1")).text
+        assert "first post" in (await client.get("/posts/feed-posts/1")).text
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        await write("second post")
+        assert "second post" in (await client.get("/posts/feed-posts/1")).text
+        assert (cache.hits, cache.misses) == (1, 2)
+
+
+@pytest.mark.parametrize("limit", [0, 101])
+async def test_feed_page_limit_is_bounded_before_the_cache(app, session_maker, monkeypatch, limit):
+    # limit=0 used to divide by zero for the page count, a huge one cached the whole table as one entry
+    cache = PageCache(MemoryBackend())
+    monkeypatch.setattr(router, "feed_cache", cache)
+    reader = await make_user(session_maker)
+
+    async with client_for(app, reader) as client:
+        response = await client.get("/posts/feed-posts/1", params={"limit": limit})
+
+    assert response.status_code == 422
+    assert (cache.hits, cache.misses) == (0, 0)
@@ -0,0 +1,73 @@
+import itertools
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src import database
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def engines():
+    """Creates engines that are disposed before the event loop closes, so no aiosqlite thread outlives it."""
+    created = []
+
+    def create(url, **kwargs):
+        created.append(create_async_engine(url, **kwargs))
+        return created[-1]
+
+    yield create
+    for engine in created:
+        await engine.dispose()
+
+
+@pytest.fixture
+def primary(tmp_path, monkeypatch, engines):
+    engine = engines(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setattr(database, "async_session_maker", sessionmaker(engine, class_=AsyncSession))
+    return engine
+
+
+def use_replicas(monkeypatch, *engines):
+    monkeypatch.setattr(database, "replica_session_makers", [
+        sessionmaker(engine, class_=AsyncSession) for engine in engines
+    ])
+    monkeypatch.setattr(database, "_next_replica", itertools.cycle(range(len(engines))))
+    monkeypatch.setattr(database, "_replica_failed_at", {})
+
+
+async def read_bind():
+    async with asynccontextmanager(database.get_read_session)() as session:
+        return session.bind
+
+
+async def test_reads_use_replica(tmp_path, monkeypatch, engines, primary):
+    replica = engines(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    use_replicas(monkeypatch, replica)
+
+    assert await read_bind() is replica
+
+
+async def test_unreachable_replica_falls_back_to_primary(tmp_path, monkeypatch, engines, primary):
+    replica = engines(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    use_replicas(monkeypatch, replica)
+
+    assert await read_bind() is primary
+    assert 0 in database._replica_failed_at
+
+
+async def test_exhausted_replica_pool_falls_back_to_primary(tmp_path, monkeypatch, engines, primary):
+    replica = engines(
+        f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}",
+        poolclass=database.InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    use_replicas(monkeypatch, replica)
+
+    async with replica.connect():
+        assert await read_bind() is primary
+
+    assert replica.pool.timeouts == 1
+    assert 0 in database._replica_failed_at
@@ -0,0 +1,105 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from src.posts.counters import POSTS, FEED, increment
+from src.posts.models import Post, Like
+from src.posts.schemas import FeedPage
+
+from conftest import client_for, make_user
+
+pytestmark = pytest.mark.anyio
+
+POSTS_SEEDED = 25
+
+
+async def seed(session_maker):
+    """Posts in pairs sharing an edit_at, so the id tie-break matters; the reader likes every third one."""
+    author, reader = await make_user(session_maker), await make_user(session_maker)
+    start = datetime(2024, 1, 1)
+    rows = [
+        {"head": f"post {i}", "description": "text", "user_id": author.id, "edit_at": start + timedelta(minutes=i // 2)}
+        for i in range(POSTS_SEEDED)
+    ]
+
+    async with session_maker() as session:
+        ids = list((await session.execute(insert(Post).returning(Post.id), rows)).scalars())
+        liked = ids[::3]
+        await session.execute(insert(Like), [{"user_id": reader.id, "post_id": id} for id in liked])
+        await session.execute(
+            Post.__table__.update().where(Post.id.in_(liked)).values(like_count=1)
+        )
+        await session.execute(increment({POSTS: len(rows), FEED: 1}))
+        await session.commit()
+
+    return reader, ids, set(liked)
+
+
+async def test_api_feed_walks_every_post_once(app, session_maker):
+    reader, ids, liked = await seed(session_maker)
+    expected = sorted(zip((row // 2 for row in range(POSTS_SEEDED)), ids), reverse=True)
+
+    pages, cursor = [], None
+    async with client_for(app, reader) as client:
+        while True:
+            response = await client.get("/posts/api/feed", params={"limit": 7, **({"cursor": cursor} if cursor else {})})
+            assert response.status_code == 200
+            page = FeedPage.model_validate(response.json())
+            pages.append(page)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        seen = [post.id for page in pages for post in page.posts]
+        assert seen == [id for _, id in expected]
+        assert [len(page.posts) for page in pages] == [7, 7, 7, 4]
+
+        for page in pages:
+            for post in page.posts:
+                assert post.liked == (post.id in liked)
+                assert post.like_count == (1 if post.id in liked else 0)
+
+        response = await client.get("/posts/api/feed", params={"limit": 7, "cursor": pages[2].prev_cursor})
+        assert [post["id"] for post in response.json()["posts"]] == [post.id for post in pages[1].posts]
+
+
+async def test_api_feed_rejects_a_malformed_cursor(app, session_maker):
+    reader, _, _ = await seed(session_maker)
+
+    async with client_for(app, reader) as client:
+        response = await client.get("/posts/api/feed", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/posts/feed-posts/0", {}),
+    ("/posts/feed-posts/-1", {}),
+    ("/posts/feed-posts/1", {"limit": 0}),
+    ("/posts/feed-posts/1", {"limit": -5}),
+    ("/posts/feed-posts/1", {"limit": 100000}),
+    ("/posts/api/feed", {"page": 0}),
+    ("/posts/api/feed", {"limit": 100000}),
+])
+async def test_feeds_reject_out_of_range_pages_and_limits(app, session_maker, path, params):
+    reader, _, _ = await seed(session_maker)
+
+    async with client_for(app, reader) as client:
+        response = await client.get(path, params=params)
+
+    assert response.status_code == 422
+
+
+async def test_api_feed_accepts_a_cursor_with_a_utc_offset(app, session_maker):
+    reader, ids, _ = await seed(session_maker)
+    # 2024-01-01 00:05 UTC written as 02:05+02:00: posts 10 and 11 are at 00:05, so the page starts at 9
+    cursor = base64.urlsafe_b64encode(json.dumps(["2024-01-01T02:05:00+02:00", ids[10], "next"]).encode()).decode()
+
+    async with client_for(app, reader) as client:
+        response = await client.get("/posts/api/feed", params={"limit": 3, "cursor": cursor})
+
+    assert response.status_code == 200
+    assert [post["id"] for post in response.json()["posts"]] == [ids[9], ids[8], ids[7]]
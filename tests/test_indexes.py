@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import event, insert
+
+from src.posts.models import Like, Post
+
+from conftest import client_for, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def engine(postgres_engine):
+    return postgres_engine
+
+
+@pytest.fixture
+def statements(engine):
+    """SQL sent to the database while the test runs, with its parameters."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+
+async def plan(engine, statements, fragment: str) -> str:
+    """EXPLAIN of the captured statement containing ``fragment``, with sequential scans priced out.
+
+    The test tables are tiny, so without enable_seqscan=off the planner would scan them
+    whatever indexes exist; with it, a seq scan in the plan means no index can serve the query.
+    """
+    statement, parameters = next((sql, params) for sql, params in statements if fragment in sql)
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        return "\n".join(row[0] for row in result)
+
+
+async def seed(session_maker):
+    author, reader = await make_user(session_maker), await make_user(session_maker)
+    async with session_maker() as session:
+        ids = list(await session.scalars(insert(Post).returning(Post.id), [
+            {"head": f"post {i}", "description": "text", "user_id": author.id} for i in range(30)
+        ]))
+        await session.execute(insert(Like), [{"user_id": reader.id, "post_id": id} for id in ids[::2]])
+        await session.commit()
+
+    return author, reader, ids
+
+
+async def test_user_listing_uses_the_author_index(app, engine, session_maker, statements):
+    author, reader, _ = await seed(session_maker)
+
+    async with client_for(app, reader) as client:
+        first = (await client.get(f"/posts/user/{author.id}", params={"limit": 5})).json()
+        await client.get(f"/posts/user/{author.id}", params={"limit": 5, "cursor": first["next_cursor"]})
+
+    listings = [(sql, params) for sql, params in statements if "WHERE post.user_id" in sql]
+    assert len(listings) == 2
+    for sql, _ in listings:
+        explained = await plan(engine, listings, sql)
+        assert "ix_post_user_id_edit_at_id" in explained and "Seq Scan" not in explained
+
+
+async def test_like_lookups_use_the_like_indexes(app, engine, session_maker, statements):
+    author, reader, ids = await seed(session_maker)
+
+    async with client_for(app, reader) as client:
+        await client.get(f"/posts/user/{author.id}")
+    async with client_for(app, author) as client:
+        await client.get(f"/posts/delete/{ids[0]}")
+
+    liked = await plan(engine, statements, 'FROM "like" \nWHERE "like".user_id')
+    assert "uq_like_user_id_post_id" in liked and "Seq Scan" not in liked
+
+    deleted_likes = await plan(engine, statements, 'DELETE FROM "like"')
+    assert "ix_like_post_id" in deleted_likes and "Seq Scan" not in deleted_likes
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from src.posts.counters import POSTS, FEED
+from src.posts.models import Counter, Like, Post
+
+from conftest import client_for, make_user
+
+pytestmark = pytest.mark.anyio
+
+CONCURRENCY = 50
+
+
+@pytest.fixture
+def engine(postgres_engine):
+    # the like path is a data-modifying CTE with ON CONFLICT, which SQLite cannot run
+    return postgres_engine
+
+
+async def make_post(session_maker, author) -> int:
+    async with session_maker() as session:
+        post_id = await session.scalar(
+            insert(Post).values(head="liked post", description="", user_id=author.id).returning(Post.id)
+        )
+        await session.commit()
+
+    return post_id
+
+
+async def like_state(session_maker, post_id: int) -> tuple[int, int]:
+    async with session_maker() as session:
+        likes = await session.scalar(select(func.count()).select_from(Like).where(Like.post_id == post_id))
+        like_count = await session.scalar(select(Post.like_count).where(Post.id == post_id))
+
+    return likes, like_count
+
+
+async def hammer(client, path: str) -> None:
+    responses = await asyncio.gather(*(client.get(path) for _ in range(CONCURRENCY)))
+    # the handlers report failures as a 200 JSON body, so only the redirect counts as success
+    assert all(response.status_code == 302 for response in responses)
+
+
+async def test_concurrent_likes_count_once(app, session_maker):
+    author, fan = await make_user(session_maker), await make_user(session_maker)
+    post_id = await make_post(session_maker, author)
+
+    async with client_for(app, fan) as client:
+        await hammer(client, f"/posts/addlike/{post_id}")
+        assert await like_state(session_maker, post_id) == (1, 1)
+
+        await hammer(client, f"/posts/deletelike/{post_id}")
+        assert await like_state(session_maker, post_id) == (0, 0)
+
+
+async def test_concurrent_likes_from_many_users(app, session_maker):
+    author = await make_user(session_maker)
+    post_id = await make_post(session_maker, author)
+    fans = [await make_user(session_maker) for _ in range(10)]
+
+    async def like_twice(fan):
+        async with client_for(app, fan) as client:
+            await asyncio.gather(*(client.get(f"/posts/addlike/{post_id}") for _ in range(5)))
+
+    await asyncio.gather(*(like_twice(fan) for fan in fans))
+
+    assert await like_state(session_maker, post_id) == (len(fans), len(fans))
+
+
+async def test_author_cannot_like_own_post(app, session_maker):
+    author = await make_user(session_maker)
+    post_id = await make_post(session_maker, author)
+
+    async with client_for(app, author) as client:
+        await hammer(client, f"/posts/addlike/{post_id}")
+
+    assert await like_state(session_maker, post_id) == (0, 0)
+
+
+async def test_feed_etag_follows_likes(app, session_maker):
+    author, reader, fan = [await make_user(session_maker) for _ in range(3)]
+    post_id = await make_post(session_maker, author)
+
+    async with client_for(app, reader) as client:
+        response = await client.get("/posts/feed-posts/1")
+        etag = response.headers["etag"]
+        assert response.status_code == 200 and "last-modified" in response.headers
+
+        response = await client.get("/posts/feed-posts/1", headers={"if-none-match": etag})
+        assert response.status_code == 304
+
+        async with client_for(app, fan) as fan_client:
+            await fan_client.get(f"/posts/addlike/{post_id}")
+
+        response = await client.get("/posts/feed-posts/1", headers={"if-none-match": etag})
+        assert response.status_code == 200 and response.headers["etag"] != etag
+        etag = response.headers["etag"]
+
+        await client.get(f"/posts/addlike/{post_id}")
+        response = await client.get("/posts/feed-posts/1", headers={"if-none-match": etag})
+        assert response.status_code == 200 and response.headers["etag"] != etag
+
+
+async def counter(session_maker, name: str) -> int:
+    async with session_maker() as session:
+        return await session.scalar(select(Counter.value).where(Counter.name == name))
+
+
+async def test_concurrent_post_writes_keep_counters_exact(app, session_maker):
+    """Adds, edits, deletes and likes from many users at once: no deadlocks and a post counter equal to count(*)."""
+    users = [await make_user(session_maker) for _ in range(10)]
+    shared = await make_post(session_maker, users[0])
+    posts_before, feed_before = await counter(session_maker, POSTS), await counter(session_maker, FEED)
+
+    async def writer(user):
+        async with client_for(app, user) as client:
+            responses = [await client.get(f"/posts/addlike/{shared}")] if user is not users[0] else []
+            for i in range(3):
+                responses.append(await client.post(
+                    "/posts/addpost", data={"head": f"{user.username} {i}", "description": "text"}
+                ))
+
+            async with session_maker() as session:
+                ids = list(await session.scalars(select(Post.id).where(Post.user_id == user.id, Post.id != shared)))
+
+            responses += await asyncio.gather(*(
+                client.post(f"/posts/edit-post/{id}", data={"head": f"{user.username} edited {id}", "description": "edited"})
+                for id in ids
+            ))
+            responses += await asyncio.gather(*(client.get(f"/posts/delete/{id}") for id in ids[:2]))
+            return responses
+
+    results = await asyncio.gather(*(writer(user) for user in users))
+    assert all(response.status_code == 302 for responses in results for response in responses)
+
+    async with session_maker() as session:
+        posts = await session.scalar(select(func.count()).select_from(Post))
+
+    # make_post does not count the shared post
+    assert posts == 1 + len(users)
+    assert await counter(session_maker, POSTS) == posts_before + len(users)
+    # likes no longer touch the feed counter: 3 adds, 3 edits and 2 deletes per user
+    assert await counter(session_maker, FEED) == feed_before + 8 * len(users)
+    assert await like_state(session_maker, shared) == (len(users) - 1, len(users) - 1)
@@ -0,0 +1,136 @@
+import asyncio
+import socket
+import time
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from src.auth import mail
+from src.auth.mail import mail_queue
+
+from conftest import client_for
+
+pytestmark = pytest.mark.anyio
+
+SMTP_DELAY = 1.0
+
+
+class SlowHandler:
+    """SMTP server stand-in taking ``delay`` seconds to accept each message, like a remote relay would."""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.recipients = []
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.delay)
+        self.recipients.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def point_smtp_at(monkeypatch, port: int) -> None:
+    monkeypatch.setattr(mail, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(mail, "SMTP_PORT", port)
+    monkeypatch.setattr(mail, "SMTP_SSL", False)
+    monkeypatch.setattr(mail, "SMTP_USER", None)
+
+
+def start_smtp(monkeypatch, handler, port: int | None = None) -> Controller:
+    controller = Controller(handler, hostname="127.0.0.1", port=port or free_port())
+    controller.start()
+    point_smtp_at(monkeypatch, controller.port)
+    return controller
+
+
+@pytest.fixture
+def slow_smtp(monkeypatch):
+    handler = SlowHandler(SMTP_DELAY)
+    controller = start_smtp(monkeypatch, handler)
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+def engine(sqlite_engine):
+    return sqlite_engine
+
+
+async def test_registration_does_not_wait_for_smtp(app, slow_smtp):
+    async with client_for(app, None) as client:
+        start = time.perf_counter()
+        response = await client.post("/auth/register", json={
+            "email": "new@example.com", "password": "a-long-password", "username": "new",
+        })
+        elapsed = time.perf_counter() - start
+
+    assert response.status_code == 201
+    assert elapsed < SMTP_DELAY / 2
+    assert slow_smtp.recipients == []
+
+    await mail_queue.stop()
+    assert slow_smtp.recipients == ["new@example.com"]
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    handler = SlowHandler()
+    controller = start_smtp(monkeypatch, handler)
+    yield handler
+    controller.stop()
+
+
+def payloads(*recipients):
+    return [{"subject": "hi", "to": to, "body": "hello"} for to in recipients]
+
+
+def test_send_batch_returns_everything_when_server_is_down(monkeypatch):
+    point_smtp_at(monkeypatch, free_port())
+    batch = payloads("a@example.com", "b@example.com")
+
+    assert mail.SMTPPool().send_batch(batch) == batch
+
+
+def test_send_batch_replaces_a_dropped_connection(smtp):
+    pool = mail.SMTPPool()
+    assert pool.send_batch(payloads("a@example.com")) == []
+
+    server, _ = pool._idle[0]
+    server.close()
+
+    assert pool.send_batch(payloads("b@example.com", "c@example.com")) == []
+    assert smtp.recipients == ["a@example.com", "b@example.com", "c@example.com"]
+    pool.close()
+
+
+async def test_queue_requeues_until_the_server_is_back(monkeypatch):
+    port = free_port()
+    point_smtp_at(monkeypatch, port)
+    queue = mail.MailQueue(workers=1, retry_delay=0.05)
+    for payload in payloads("a@example.com", "b@example.com", "c@example.com"):
+        queue.put(payload)
+
+    await asyncio.sleep(0.1)
+    handler = SlowHandler()
+    controller = start_smtp(monkeypatch, handler, port)
+    try:
+        await queue.stop()
+    finally:
+        controller.stop()
+
+    assert sorted(handler.recipients) == ["a@example.com", "b@example.com", "c@example.com"]
+
+
+async def test_queue_gives_up_after_the_last_retry(monkeypatch, caplog):
+    point_smtp_at(monkeypatch, free_port())
+    queue = mail.MailQueue(workers=1, retries=2, retry_delay=0.01)
+    queue.put(payloads("a@example.com")[0])
+
+    await queue.stop(timeout=5)
+
+    assert "giving up on 1 emails after 3 attempts" in caplog.text
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+import src.app
+from src.app import optional_superuser
+from src.metrics import instrument_engine, registry
+
+from conftest import client_for, make_user
+
+pytestmark = pytest.mark.anyio
+
+STATS = ["/metrics", "/pool-stats", "/cache-stats"]
+
+
+@pytest.fixture
+def engine(sqlite_engine):
+    return sqlite_engine
+
+
+@pytest.mark.parametrize("path", STATS)
+async def test_stats_need_a_superuser_or_the_token(app, session_maker, monkeypatch, path):
+    monkeypatch.setattr(src.app, "METRICS_TOKEN", "scrape-token")
+
+    async with client_for(app, None) as client:
+        assert (await client.get(path)).status_code == 403
+        assert (await client.get(path, headers={"authorization": "Bearer wrong"})).status_code == 403
+        assert (await client.get(path, headers={"authorization": "Bearer scrape-token"})).status_code == 200
+
+        admin = await make_user(session_maker)
+        app.dependency_overrides[optional_superuser] = lambda: admin
+        assert (await client.get(path)).status_code == 200
+
+
+async def test_no_token_configured_means_no_token_access(app, monkeypatch):
+    monkeypatch.setattr(src.app, "METRICS_TOKEN", None)
+
+    async with client_for(app, None) as client:
+        assert (await client.get("/metrics", headers={"authorization": "Bearer None"})).status_code == 403
+
+
+async def test_metrics_count_requests_by_route(app, session_maker, monkeypatch):
+    monkeypatch.setattr(src.app, "METRICS_TOKEN", "scrape-token")
+    user = await make_user(session_maker)
+
+    async with client_for(app, user) as client:
+        await client.get("/posts/api/feed")
+        body = (await client.get("/metrics", headers={"authorization": "Bearer scrape-token"})).text
+
+    assert 'route="/posts/api/feed"' in body
+    assert "db_pool_size" in body
+
+
+async def test_failed_statements_leave_no_timing_state(engine):
+    instrument_engine(engine)
+    observed = registry.statements.count
+
+    async with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                await conn.execute(text("SELECT * FROM no_such_table"))
+        await conn.execute(text("SELECT 1"))
+
+        assert "query_start" not in conn.sync_connection.info
+        assert registry.statements.count == observed + 1
@@ -0,0 +1,40 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from src.posts.pagination import NEXT, PREV, decode_cursor, encode_cursor
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def test_cursor_round_trip():
+    edit_at = datetime(2024, 1, 2, 3, 4, 5)
+
+    assert decode_cursor(encode_cursor(edit_at, 42, PREV)) == (edit_at, 42, PREV)
+
+
+def test_aware_cursor_is_read_as_naive_utc():
+    cursor = raw_cursor(["2024-01-02T05:04:05+02:00", 42, NEXT])
+
+    assert decode_cursor(cursor) == (datetime(2024, 1, 2, 3, 4, 5), 42, NEXT)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    raw_cursor(5),
+    raw_cursor([None, 1, NEXT]),
+    raw_cursor(["2024-01-01T00:00:00", None, NEXT]),
+    raw_cursor(["2024-01-01T00:00:00", 1]),
+    raw_cursor(["2024-01-01T00:00:00", 1, "sideways"]),
+])
+def test_malformed_cursor_is_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+
+    assert error.value.status_code == 400
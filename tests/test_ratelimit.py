@@ -0,0 +1,89 @@
+import ipaddress
+import time
+
+import pytest
+from starlette.requests import Request
+
+from src import ratelimit
+from src.ratelimit import MemoryBuckets, RedisBuckets, client_ip
+
+pytestmark = pytest.mark.anyio
+
+# slow enough that nothing refills while a test runs
+SLOW = 0.001
+
+
+@pytest.fixture(params=["memory", "redis"])
+def buckets(request):
+    if request.param == "memory":
+        return MemoryBuckets()
+
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis runs Lua scripts through it
+    return RedisBuckets(fakeredis.aioredis.FakeRedis())
+
+
+async def test_rejected_requests_spend_no_tokens(buckets):
+    user, ip = ("like:user:1", SLOW, 2), ("like:ip:1.2.3.4", SLOW, 1)
+
+    assert await buckets.acquire([user, ip]) == 0
+    assert await buckets.acquire([user, ip]) > 0
+    # the IP bucket refused the second request, so the user's second token is still there
+    assert await buckets.acquire([user]) == 0
+    assert await buckets.acquire([user]) > 0
+
+
+async def test_retry_after_waits_for_the_emptiest_bucket(buckets):
+    await buckets.acquire([("a", 1, 1), ("b", 0.1, 1)])
+
+    assert 9 < await buckets.acquire([("a", 1, 1), ("b", 0.1, 1)]) <= 10
+
+
+async def test_sweep_keeps_buckets_that_have_not_refilled():
+    buckets = MemoryBuckets(max_keys=2)
+    await buckets.acquire([("post:user:1", SLOW, 1)])
+    await buckets.acquire([("like:user:1", 1000, 1)])
+    time.sleep(0.01)
+
+    # a fast scope triggers the sweep; the slow scope's empty bucket must survive it
+    await buckets.acquire([("like:user:2", 1000, 1)])
+
+    assert await buckets.acquire([("post:user:1", SLOW, 1)]) > 0
+
+
+async def test_sweep_makes_room_when_every_bucket_is_draining(monkeypatch):
+    buckets = MemoryBuckets(max_keys=100)
+    sweeps = []
+    sweep = buckets._sweep
+    monkeypatch.setattr(buckets, "_sweep", lambda now: sweeps.append(now) or sweep(now))
+
+    # every bucket is still draining; the first user keeps coming back and must not be forgotten
+    for user in range(1, 1000):
+        await buckets.acquire([(f"post:user:{user}", SLOW, 1)])
+        if user % 10 == 0:
+            await buckets.acquire([("post:user:0", SLOW, 1)])
+
+    assert len(buckets._buckets) <= 100
+    assert len(sweeps) <= 1100 // 25
+    assert await buckets.acquire([("post:user:0", SLOW, 1)]) > 0
+    assert await buckets.acquire([("post:user:1", SLOW, 1)]) == 0
+
+
+def request_from(peer: str, forwarded_for: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "client": (peer, 50000), "headers": headers})
+
+
+def test_client_ip_ignores_forwarded_for_from_untrusted_peers(monkeypatch):
+    monkeypatch.setattr(ratelimit, "_trusted_proxies", [])
+
+    assert client_ip(request_from("203.0.113.9", "1.2.3.4")) == "203.0.113.9"
+
+
+def test_client_ip_walks_forwarded_for_through_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(ratelimit, "_trusted_proxies", [ipaddress.ip_network("10.0.0.0/8")])
+
+    # the leftmost entry is whatever the client claimed; the proxies appended the rest
+    request = request_from("10.0.0.1", "6.6.6.6, 198.51.100.7, 10.0.0.2")
+    assert client_ip(request) == "198.51.100.7"
+    assert client_ip(request_from("10.0.0.1")) == "10.0.0.1"
@@ -0,0 +1,75 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from src.posts import search
+from src.posts.counters import POSTS, FEED, increment
+from src.posts.models import Post
+from src.posts.search import InvertedIndex, decode_search_cursor, search_posts
+
+from conftest import make_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(search, "_index", InvertedIndex())
+
+
+async def seed(session_maker):
+    user = await make_user(session_maker)
+    rows = [
+        {"head": "apple pie", "description": "apple apple and cinnamon", "user_id": user.id},
+        {"head": "apple tart", "description": "thin pastry", "user_id": user.id},
+        {"head": "banana bread", "description": "no apples here", "user_id": user.id},
+        {"head": "pie crust", "description": "butter and flour", "user_id": user.id},
+    ]
+    async with session_maker() as session:
+        await session.execute(insert(Post), rows)
+        await session.execute(increment({POSTS: len(rows), FEED: 1}))
+        await session.commit()
+
+
+async def test_search_ranks_and_paginates(session_maker):
+    await seed(session_maker)
+
+    async with session_maker() as session:
+        posts, cursor = await search_posts(session, "apple", limit=1)
+        assert [post["head"] for post in posts] == ["apple pie"]
+        assert cursor is not None
+
+        rest, cursor = await search_posts(session, "apple", limit=10, cursor=cursor)
+        assert [post["head"] for post in rest] == ["apple tart"]
+        assert cursor is None
+
+        both, _ = await search_posts(session, "apple pie", limit=10)
+        assert [post["head"] for post in both] == ["apple pie"]
+
+        none, cursor = await search_posts(session, "cherry", limit=10)
+        assert none == [] and cursor is None
+
+
+async def test_in_process_index_follows_writes(sqlite_engine):
+    session_maker = sessionmaker(sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    await seed(session_maker)
+
+    async with session_maker() as session:
+        assert [post["head"] for post in (await search_posts(session, "crust"))[0]] == ["pie crust"]
+
+        user = await make_user(session_maker)
+        await session.execute(insert(Post).values(head="crust two", description="", user_id=user.id))
+        await session.execute(increment({FEED: 1}))
+        await session.commit()
+
+        heads = [post["head"] for post in (await search_posts(session, "crust"))[0]]
+        assert sorted(heads) == ["crust two", "pie crust"]
+
+
+def test_search_cursor_shape():
+    with pytest.raises(HTTPException) as error:
+        decode_search_cursor("WzFd")
+
+    assert error.value.status_code == 400